@@ -1,5 +1,7 @@
+import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.staticfiles import StaticFiles
 from app.routes.auth import router as auth_router
 from app.routes.posts import router as posts_router
 from app.routes.feed import router as feed_router
@@ -13,6 +15,12 @@ from app.routes.comments import router as comments_router
 from app.routes.translate import router as translate_router
 from app.routes.entities import router as entities_router
 from app.routes.bookmarks import router as bookmarks_router
+from app.routes.media import router as media_router
+from app.routes.events import router as events_router
+from app.routes.metrics import router as metrics_router
+from app.services import events, context_refresh, rename_jobs
+from app.services import entity_catalog, entity_graph, entity_resolution
+from app.services.direct_upload import STORAGE_BACKEND, LOCAL_MEDIA_DIR, LOCAL_MEDIA_URL
 
 app = FastAPI(
     title="Pulse Backend API",
@@ -42,6 +50,31 @@ app.include_router(comments_router)
 app.include_router(translate_router)
 app.include_router(entities_router)
 app.include_router(bookmarks_router)
+app.include_router(media_router)
+app.include_router(events_router)
+app.include_router(metrics_router)
+
+# Serve files from the local stand-in storage backend
+if STORAGE_BACKEND == "local":
+    os.makedirs(LOCAL_MEDIA_DIR, exist_ok=True)
+    app.mount(LOCAL_MEDIA_URL, StaticFiles(directory=LOCAL_MEDIA_DIR), name="local_media")
+
+
+@app.on_event("startup")
+async def start_background_services():
+    # Finish username propagation jobs interrupted by a restart
+    rename_jobs.start()
+
+    # Cross-worker fan-out for real-time events
+    await events.start()
+
+    await entity_catalog.ensure_indexes()
+    await entity_graph.ensure_indexes()
+    await entity_resolution.ensure_indexes()
+
+    # Periodic per-entity refresh of recent posts' Pulse Context
+    await context_refresh.start()
+
 
 @app.get("/")
 def root():
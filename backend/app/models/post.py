@@ -1,6 +1,13 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
+
+# Fields feed cards never render; excluded at query time so Mongo doesn't send
+# them and the API doesn't serialize them. Full posts come from GET /posts/{id}.
+FEED_CARD_PROJECTION = {
+    "context_data": 0,
+    "entities.confidence": 0
+}
 
 
 class PostCreate(BaseModel):
@@ -8,6 +15,14 @@ class PostCreate(BaseModel):
     # media_url and media_type will be set from file upload
 
 
+class PostFromUpload(BaseModel):
+    """Post whose media was uploaded directly to storage"""
+    content: str
+    public_id: str
+    version: int
+    signature: str
+
+
 class PostInDB(BaseModel):
     user_id: str
     username: str
@@ -16,3 +31,29 @@ class PostInDB(BaseModel):
     media_type: Optional[str] = None  # "image" or "video"
     likes: int = 0
     created_at: datetime
+
+
+class EntityTag(BaseModel):
+    text: str
+    label: str
+    source: Optional[str] = None
+    identified_as: Optional[str] = None
+
+
+class PostCard(BaseModel):
+    """A post as shown in feed lists (see FEED_CARD_PROJECTION)"""
+    id: str = Field(alias="_id")
+    user_id: str
+    username: str
+    content: str
+    entities: List[EntityTag] = []
+    risk_score: float = 0
+    media_url: Optional[str] = None
+    media_type: Optional[str] = None
+    likes: int = 0
+    created_at: datetime
+    profile_pic_url: Optional[str] = None
+    comment_count: int = 0
+    is_liked_by_user: bool = False
+    is_followed_by_user: bool = False
+    is_bookmarked: bool = False
@@ -1,14 +1,31 @@
+import asyncio
+import os
 from fastapi import APIRouter, HTTPException
 from datetime import datetime
 from pydantic import BaseModel
 
 from app.models.user import UserCreate
 from app.services.database import db
-from app.auth.hash import hash_password, verify_password
+from app.auth.hash import hash_password_async, verify_password_async, needs_rehash
 from app.auth.jwt import create_access_token
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
+# Password checks in flight per worker; extra requests queue briefly, then get 429
+MAX_CONCURRENT_LOGINS = int(os.getenv("MAX_CONCURRENT_LOGINS", 8))
+LOGIN_QUEUE_TIMEOUT = float(os.getenv("LOGIN_QUEUE_TIMEOUT_SECONDS", 5))
+_login_slots = asyncio.Semaphore(MAX_CONCURRENT_LOGINS)
+
+
+async def _acquire_login_slot():
+    try:
+        await asyncio.wait_for(_login_slots.acquire(), timeout=LOGIN_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many login attempts right now, please retry"
+        )
+
 
 class UserLogin(BaseModel):
     email: str
@@ -27,10 +44,16 @@ async def signup(user: UserCreate):
     if existing:
         raise HTTPException(status_code=400, detail="User already exists")
 
+    await _acquire_login_slot()
+    try:
+        password_hash = await hash_password_async(user.password)
+    finally:
+        _login_slots.release()
+
     new_user = {
         "username": user.username,
         "email": user.email,
-        "password_hash": hash_password(user.password),
+        "password_hash": password_hash,
         "bio": "",
         "followers": [],
         "following": [],
@@ -52,7 +75,20 @@ async def login(credentials: UserLogin):
     if not user:
         raise HTTPException(status_code=400, detail="Invalid credentials")
 
-    if not verify_password(credentials.password, user["password_hash"]):
+    await _acquire_login_slot()
+    try:
+        valid = await verify_password_async(credentials.password, user["password_hash"])
+
+        # Upgrade hashes made with older Argon2 parameters
+        if valid and needs_rehash(user["password_hash"]):
+            await db.users.update_one(
+                {"_id": user["_id"]},
+                {"$set": {"password_hash": await hash_password_async(credentials.password)}}
+            )
+    finally:
+        _login_slots.release()
+
+    if not valid:
         raise HTTPException(status_code=400, detail="Invalid credentials")
 
     token = create_access_token({
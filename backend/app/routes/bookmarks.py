@@ -10,6 +10,7 @@ from bson import ObjectId
 
 from app.services.database import db
 from app.auth.dependency import get_current_user
+from app.services.http_cache import invalidate
 
 router = APIRouter(prefix="/bookmarks", tags=["Bookmarks"])
 
@@ -38,6 +39,7 @@ async def toggle_bookmark(post_id: str, user=Depends(get_current_user)):
     if existing:
         # Remove bookmark
         await db.bookmarks.delete_one({"_id": existing["_id"]})
+        invalidate(f"post:{post_id}")
         return {"message": "Bookmark removed", "bookmarked": False}
     else:
         # Add bookmark
@@ -46,6 +48,7 @@ async def toggle_bookmark(post_id: str, user=Depends(get_current_user)):
             "user_id": user_id,
             "created_at": datetime.utcnow()
         })
+        invalidate(f"post:{post_id}")
         return {"message": "Post bookmarked", "bookmarked": True}
 
 
@@ -115,4 +118,6 @@ async def remove_bookmark(post_id: str, user=Depends(get_current_user)):
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Bookmark not found")
     
+    invalidate(f"post:{post_id}")
+    
     return {"message": "Bookmark removed"}
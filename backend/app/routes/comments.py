@@ -1,14 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from bson import ObjectId
 from datetime import datetime
 from app.services.database import db
-from app.auth.dependency import get_current_user
+from app.auth.dependency import get_user_context, UserContext
 from app.services.ml_client import analyze_text
+from app.services.risk import BLOCK_THRESHOLD
+from app.services.http_cache import cached_json_response, invalidate
+from app.services import events
 
 router = APIRouter(prefix="/comments", tags=["Community Notes"])
 
 @router.post("/{post_id}")
-async def add_community_note(post_id: str, payload: dict, user=Depends(get_current_user)):
+async def add_community_note(post_id: str, payload: dict, ctx: UserContext = Depends(get_user_context)):
     """
     Add a new Community Note (Comment) to a post.
     Comments also go through NER analysis to extract entities.
@@ -28,7 +31,7 @@ async def add_community_note(post_id: str, payload: dict, user=Depends(get_curre
     
     # Run NER on comment content
     try:
-        analysis = await analyze_text(content)
+        analysis = await analyze_text(content, with_context=False)
         entities = analysis.get("entities", [])
         risk_score = analysis.get("risk_score", 0)
     except:
@@ -36,7 +39,7 @@ async def add_community_note(post_id: str, payload: dict, user=Depends(get_curre
         risk_score = 0
     
     # Block high-risk comments
-    if risk_score > 0.6:
+    if risk_score > BLOCK_THRESHOLD:
         raise HTTPException(
             status_code=403,
             detail="Comment blocked due to sensitive content"
@@ -44,14 +47,22 @@ async def add_community_note(post_id: str, payload: dict, user=Depends(get_curre
 
     note = {
         "post_id": post_id,
-        "user_id": user["user_id"],
-        "username": user["username"],
+        "user_id": ctx.user_id,
+        "username": await ctx.get_username(),
         "content": content,
         "entities": entities,  # NER entities from comment
         "created_at": datetime.utcnow()
     }
 
     result = await db.comments.insert_one(note)
+    invalidate(f"comments:{post_id}", f"post:{post_id}")
+    await events.publish(["global", f"post:{post_id}"], {
+        "type": "comment_added",
+        "post_id": post_id,
+        "comment_id": str(result.inserted_id),
+        "username": note["username"],
+        "content": note["content"]
+    })
 
     return {
         "message": "Note added",
@@ -62,14 +73,22 @@ async def add_community_note(post_id: str, payload: dict, user=Depends(get_curre
     }
 
 @router.get("/{post_id}")
-async def get_post_notes(post_id: str):
+async def get_post_notes(post_id: str, request: Request):
     """
     Fetch all community notes for a specific post.
     """
-    cursor = db.comments.find({"post_id": post_id}).sort("created_at", -1)
-    notes = []
-    async for doc in cursor:
-        doc["_id"] = str(doc["_id"])
-        notes.append(doc)
-    
-    return notes
\ No newline at end of file
+    async def build():
+        cursor = db.comments.find({"post_id": post_id}).sort("created_at", -1)
+        notes = []
+        async for doc in cursor:
+            doc["_id"] = str(doc["_id"])
+            notes.append(doc)
+        return notes
+
+    return await cached_json_response(
+        request,
+        key=f"comments:{post_id}",
+        build=build,
+        scopes=[f"comments:{post_id}"],
+        cache_control="public, max-age=15"
+    )
\ No newline at end of file
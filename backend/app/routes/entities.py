@@ -5,20 +5,23 @@ This module provides endpoints to explore and browse content by NER-extracted en
 Users can discover posts mentioning specific people, organizations, or locations.
 """
 
-from fastapi import APIRouter, Depends, HTTPException
-from collections import Counter
+from fastapi import APIRouter, Depends, HTTPException, Request
 from datetime import datetime, timedelta
 from bson import ObjectId
 
 from app.services.database import db
 from app.auth.dependency import get_current_user
 from app.services.ml_client import analyze_text, fetch_wikipedia_summary
+from app.services.http_cache import cached_json_response
+from app.services import entity_graph
+from app.services.entity_resolution import resolve_canonical_id
 
 router = APIRouter(prefix="/entities", tags=["Entities (NER)"])
 
 
 @router.get("/")
 async def list_all_entities(
+    request: Request,
     label: str = None,
     limit: int = 50,
     user=Depends(get_current_user)
@@ -29,33 +32,32 @@ async def list_all_entities(
     
     This is a core NER feature - browse the knowledge graph of extracted entities.
     """
-    # Build query
-    match_stage = {}
-    if label:
-        match_stage = {"entities.label": label.upper()}
-    
-    # Aggregate to get unique entities with counts
-    pipeline = [
-        {"$match": match_stage} if match_stage else {"$match": {}},
-        {"$unwind": "$entities"},
-        {"$group": {
-            "_id": {
-                "text": "$entities.text",
-                "label": "$entities.label"
-            },
-            "count": {"$sum": 1},
-            "last_seen": {"$max": "$created_at"}
-        }},
-        {"$sort": {"count": -1}},
-        {"$limit": limit}
-    ]
+    return await cached_json_response(
+        request,
+        key=f"entities:{label}:{limit}",
+        build=lambda: _list_entities(label, limit),
+        scopes=["entities"],
+        cache_control="private, max-age=60"
+    )
+
+
+async def _list_entities(label: str, limit: int):
+    # Read from the incrementally maintained entity catalog
+    query = {"label": label.upper()} if label else {}
+    cursor = (
+        db.entity_catalog
+        .find(query)
+        .sort("mention_count", -1)
+        .limit(limit)
+    )
     
     entities = []
-    async for doc in db.posts.aggregate(pipeline):
+    async for doc in cursor:
         entities.append({
-            "text": doc["_id"]["text"],
-            "label": doc["_id"]["label"],
-            "mention_count": doc["count"],
+            "text": doc["text"],
+            "canonical_id": doc["canonical_id"],
+            "label": doc["label"],
+            "mention_count": doc["mention_count"],
             "last_seen": doc["last_seen"]
         })
     
@@ -67,31 +69,32 @@ async def list_all_entities(
 
 
 @router.get("/stats")
-async def entity_statistics(user=Depends(get_current_user)):
+async def entity_statistics(request: Request, user=Depends(get_current_user)):
     """
     Get statistics about entity distribution across the platform.
     Shows breakdown by entity type (PER, ORG, LOC, GPE).
     """
-    pipeline = [
-        {"$unwind": "$entities"},
-        {"$group": {
-            "_id": "$entities.label",
-            "count": {"$sum": 1},
-            "unique_entities": {"$addToSet": "$entities.text"}
-        }}
-    ]
-    
+    return await cached_json_response(
+        request,
+        key="entities:stats",
+        build=_entity_statistics,
+        scopes=["entities"],
+        cache_control="private, max-age=60"
+    )
+
+
+async def _entity_statistics():
     stats = {}
-    async for doc in db.posts.aggregate(pipeline):
-        label = doc["_id"]
-        stats[label] = {
-            "total_mentions": doc["count"],
-            "unique_count": len(doc["unique_entities"])
+    async for doc in db.entity_label_stats.find({"unique_count": {"$gt": 0}}):
+        stats[doc["_id"]] = {
+            "total_mentions": doc["total_mentions"],
+            "unique_count": doc["unique_count"]
         }
     
     # Total posts with entities
-    posts_with_entities = await db.posts.count_documents({"entities.0": {"$exists": True}})
-    total_posts = await db.posts.count_documents({})
+    counter = await db.counters.find_one({"_id": "posts_with_entities"})
+    posts_with_entities = counter["value"] if counter else 0
+    total_posts = await db.posts.estimated_document_count()
     
     return {
         "by_type": stats,
@@ -111,17 +114,17 @@ async def get_entity_profile(entity_text: str, user=Depends(get_current_user)):
     """
     user_id = user["user_id"]
     
-    # 1. Find posts mentioning this entity
+    # 1. Find posts mentioning this entity under any alias
+    entity_id = await resolve_canonical_id(entity_text)
     cursor = (
         db.posts
-        .find({"entities.text": {"$regex": f"^{entity_text}$", "$options": "i"}})
+        .find({"entities.canonical_id": entity_id})
         .sort("created_at", -1)
         .limit(20)
     )
     
     posts = []
     entity_info = None
-    co_occurring = Counter()
     
     async for post in cursor:
         post["_id"] = str(post["_id"])
@@ -129,15 +132,10 @@ async def get_entity_profile(entity_text: str, user=Depends(get_current_user)):
         
         # Find the entity info from the post
         for ent in post.get("entities", []):
-            if ent["text"].lower() == entity_text.lower():
+            if ent.get("canonical_id") == entity_id:
                 entity_info = ent
                 break
         
-        # Track co-occurring entities
-        for ent in post.get("entities", []):
-            if ent["text"].lower() != entity_text.lower():
-                co_occurring[(ent["text"], ent["label"])] += 1
-        
         # Ensure likes has default value
         post["likes"] = post.get("likes", 0)
         
@@ -157,20 +155,21 @@ async def get_entity_profile(entity_text: str, user=Depends(get_current_user)):
     if not posts:
         raise HTTPException(status_code=404, detail="Entity not found in any posts")
     
+    canonical_name = entity_info.get("canonical_name") if entity_info else None
+    
     # 2. Get Wikipedia info
-    wiki_data = await fetch_wikipedia_summary(entity_text)
+    wiki_data = await fetch_wikipedia_summary(canonical_name or entity_text)
     
-    # 3. Build co-occurring entities list
-    related_entities = [
-        {"text": text, "label": label, "co_occurrences": count}
-        for (text, label), count in co_occurring.most_common(10)
-    ]
+    # 3. Co-occurring entities from the precomputed co-occurrence graph
+    related_entities = await entity_graph.top_neighbors(entity_id, limit=10)
     
     return {
         "entity": {
             "text": entity_text,
             "label": entity_info.get("label") if entity_info else "UNKNOWN",
-            "identified_as": entity_info.get("identified_as") if entity_info else None
+            "identified_as": entity_info.get("identified_as") if entity_info else None,
+            "canonical_id": entity_id,
+            "canonical_name": canonical_name
         },
         "wikipedia": wiki_data,
         "mention_count": len(posts),
@@ -179,6 +178,19 @@ async def get_entity_profile(entity_text: str, user=Depends(get_current_user)):
     }
 
 
+@router.get("/{entity_text}/graph")
+async def get_entity_graph(entity_text: str, limit: int = 10, user=Depends(get_current_user)):
+    """
+    Co-occurrence graph around an entity: the entity, its top `limit`
+    neighbors (recency-weighted), and the edges among them.
+    """
+    entity_id = await resolve_canonical_id(entity_text)
+    graph = await entity_graph.ego_graph(entity_id, entity_text, limit=min(limit, 50))
+    if len(graph["nodes"]) == 1:
+        raise HTTPException(status_code=404, detail="No co-occurrences for this entity")
+    return graph
+
+
 @router.get("/trending/today")
 async def trending_entities_today(user=Depends(get_current_user)):
     """
@@ -195,7 +207,8 @@ async def trending_entities_today(user=Depends(get_current_user)):
         {"$unwind": "$entities"},
         {"$match": {"entities.label": {"$in": ["PER", "ORG", "GPE", "LOC"]}}},
         {"$group": {
-            "_id": {"text": "$entities.text", "label": "$entities.label"},
+            "_id": {"id": "$entities.canonical_id", "label": "$entities.label"},
+            "text": {"$first": "$entities.canonical_name"},
             "count": {"$sum": 1}
         }},
         {"$sort": {"count": -1}},
@@ -207,28 +220,31 @@ async def trending_entities_today(user=Depends(get_current_user)):
         {"$match": {"created_at": {"$gte": two_days_ago, "$lt": yesterday}}},
         {"$unwind": "$entities"},
         {"$group": {
-            "_id": {"text": "$entities.text", "label": "$entities.label"},
+            "_id": {"id": "$entities.canonical_id", "label": "$entities.label"},
             "count": {"$sum": 1}
         }}
     ]
     
     today_counts = {}
+    names = {}
     async for doc in db.posts.aggregate(pipeline_today):
-        key = (doc["_id"]["text"], doc["_id"]["label"])
+        key = (doc["_id"]["id"], doc["_id"]["label"])
         today_counts[key] = doc["count"]
+        names[key] = doc["text"]
     
     prev_counts = {}
     async for doc in db.posts.aggregate(pipeline_prev):
-        key = (doc["_id"]["text"], doc["_id"]["label"])
+        key = (doc["_id"]["id"], doc["_id"]["label"])
         prev_counts[key] = doc["count"]
     
     # Calculate velocity (change from previous period)
     trending = []
-    for (text, label), count in today_counts.items():
-        prev_count = prev_counts.get((text, label), 0)
+    for (entity_id, label), count in today_counts.items():
+        prev_count = prev_counts.get((entity_id, label), 0)
         velocity = count - prev_count
         trending.append({
-            "text": text,
+            "text": names[(entity_id, label)],
+            "canonical_id": entity_id,
             "label": label,
             "mentions_24h": count,
             "velocity": velocity,
@@ -0,0 +1,91 @@
+"""
+Real-Time Event Stream (Server-Sent Events)
+
+Clients open one long-lived GET /events/stream connection instead of
+polling /feed/, /posts/ and /trending/. Browsers' EventSource cannot set
+headers, so the JWT may also be passed as the `token` query parameter.
+"""
+
+import asyncio
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from jose import JWTError
+
+import orjson
+
+from app.auth.dependency import decode_token
+from app.services.database import db
+from app.services import events
+from app.services.entity_resolution import resolve_canonical_id
+
+router = APIRouter(prefix="/events", tags=["Real-time"])
+
+HEARTBEAT_SECONDS = 15
+
+
+def _authenticate(request: Request, token: str = None) -> dict:
+    auth_header = request.headers.get("Authorization") or ""
+    if auth_header.startswith("Bearer "):
+        token = auth_header[7:]
+    if not token:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    try:
+        return decode_token(token)
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+
+
+async def _resolve_topics(requested: str, user_id: str) -> set:
+    """Expand the requested topic list ("following" -> followed users)."""
+    topics = set()
+    for topic in (t.strip() for t in requested.split(",")):
+        if not topic:
+            continue
+        if topic == "following":
+            async for follow in db.follows.find({"follower_id": user_id}, {"following_id": 1}):
+                topics.add(f"user:{follow['following_id']}")
+        elif topic.startswith("entity:"):
+            # Any alias subscribes to the canonical entity
+            topics.add(f"entity:{await resolve_canonical_id(topic[len('entity:'):])}")
+        elif topic == "global" or topic.split(":", 1)[0] in ("user", "post"):
+            topics.add(topic)
+        else:
+            raise HTTPException(status_code=400, detail=f"Unknown topic: {topic}")
+    return topics
+
+
+@router.get("/stream")
+async def event_stream(request: Request, topics: str = "global", token: str = None):
+    """
+    Subscribe to live events as text/event-stream.
+
+    `topics` is a comma-separated list of: global, following, user:<id>,
+    entity:<text>, post:<post_id>. Event types: post_created, like_count,
+    comment_added, and resync (events were dropped; refetch).
+    """
+    user = _authenticate(request, token)
+    subscribed = await _resolve_topics(topics, user["user_id"])
+    subscription = events.subscribe(subscribed)
+
+    async def stream():
+        try:
+            yield b"retry: 5000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await subscription.next_event(HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": ping\n\n"
+                    continue
+
+                yield (
+                    b"event: " + event["type"].encode() + b"\n"
+                    b"data: " + orjson.dumps(event, default=str) + b"\n\n"
+                )
+        finally:
+            events.unsubscribe(subscription)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,22 +1,17 @@
 from fastapi import APIRouter, Depends
-from app.services.database import db
+from fastapi.responses import ORJSONResponse
+from typing import List
 from app.auth.dependency import get_current_user
+from app.models.post import PostCard
+from app.services import feed_cache
+from app.services.post_enrichment import enrich_posts_for_viewer
 
 router = APIRouter(prefix="/feed", tags=["Feed"])
 
 
-@router.get("/")
+@router.get("/", responses={200: {"model": List[PostCard]}})
 async def get_feed(user=Depends(get_current_user)):
-    posts_cursor = (
-        db.posts
-        .find()
-        .sort("created_at", -1)
-        .limit(20)
-    )
+    posts = await feed_cache.get_newest_posts(20)
+    posts = await enrich_posts_for_viewer(posts, user["user_id"])
 
-    posts = []
-    async for post in posts_cursor:
-        post["_id"] = str(post["_id"])
-        posts.append(post)
-
-    return posts
+    return ORJSONResponse(posts)
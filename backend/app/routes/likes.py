@@ -3,6 +3,8 @@ from bson import ObjectId
 
 from app.services.database import db
 from app.auth.dependency import get_current_user
+from app.services.http_cache import invalidate
+from app.services import feed_cache, events
 
 router = APIRouter(prefix="/likes", tags=["Likes"])
 
@@ -38,8 +40,15 @@ async def toggle_like(
             {"_id": ObjectId(post_id)},
             {"$inc": {"likes": -1}}
         )
+        invalidate(f"post:{post_id}")
         # Get updated like count
         updated_post = await db.posts.find_one({"_id": ObjectId(post_id)})
+        await feed_cache.update_post(post_id, {"likes": updated_post.get("likes", 0)})
+        await events.publish(["global", f"post:{post_id}"], {
+            "type": "like_count",
+            "post_id": post_id,
+            "likes": updated_post.get("likes", 0)
+        })
         return {
             "message": "Post unliked",
             "liked": False,
@@ -55,8 +64,15 @@ async def toggle_like(
             {"_id": ObjectId(post_id)},
             {"$inc": {"likes": 1}}
         )
+        invalidate(f"post:{post_id}")
         # Get updated like count
         updated_post = await db.posts.find_one({"_id": ObjectId(post_id)})
+        await feed_cache.update_post(post_id, {"likes": updated_post.get("likes", 0)})
+        await events.publish(["global", f"post:{post_id}"], {
+            "type": "like_count",
+            "post_id": post_id,
+            "likes": updated_post.get("likes", 0)
+        })
         return {
             "message": "Post liked",
             "liked": True,
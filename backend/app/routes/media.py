@@ -0,0 +1,62 @@
+"""
+Direct Media Upload Routes
+
+Issues signed parameters so clients upload media straight to storage,
+keeping multi-megabyte request bodies off the API workers. Posts are then
+created with POST /posts/from-upload.
+"""
+
+import os
+import shutil
+from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, Form
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+
+from app.auth.dependency import get_current_user
+from app.services.direct_upload import (
+    STORAGE_BACKEND,
+    LOCAL_MEDIA_DIR,
+    issue_upload_params,
+    sign_local_upload,
+    local_media_path
+)
+
+router = APIRouter(prefix="/media", tags=["Media"])
+
+
+class UploadParamsRequest(BaseModel):
+    media_type: str  # "image" or "video"
+
+
+@router.post("/upload-params")
+async def get_upload_params(request: UploadParamsRequest, user=Depends(get_current_user)):
+    """
+    Get short-lived signed parameters for uploading one media file directly
+    to storage. Send the file to `upload_url` with `fields` as form data.
+    """
+    return await issue_upload_params(user["user_id"], request.media_type)
+
+
+@router.post("/local-upload")
+async def local_upload(
+    public_id: str = Form(...),
+    expires: int = Form(...),
+    token: str = Form(...),
+    file: UploadFile = File(...)
+):
+    """
+    Upload target for the local stand-in storage backend.
+    Returns the same fields Cloudinary does (public_id, version, signature).
+    """
+    if STORAGE_BACKEND != "local":
+        raise HTTPException(status_code=404, detail="Local storage backend is disabled")
+
+    signed = sign_local_upload(public_id, expires, token)
+
+    def _save():
+        os.makedirs(LOCAL_MEDIA_DIR, exist_ok=True)
+        with open(local_media_path(public_id), "wb") as out:
+            shutil.copyfileobj(file.file, out)
+
+    await run_in_threadpool(_save)
+    return signed
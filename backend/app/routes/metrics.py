@@ -0,0 +1,18 @@
+from fastapi import APIRouter
+
+from app.services import upstream
+from app.services.ml_client import analysis_stats
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+
+@router.get("/upstreams")
+async def upstream_metrics():
+    """Circuit breaker state, rate-limit tokens and call counters per upstream."""
+    return upstream.metrics()
+
+
+@router.get("/analysis")
+async def analysis_metrics():
+    """Texts analyzed, and how many without the ML service (degraded)."""
+    return dict(analysis_stats)
@@ -1,13 +1,16 @@
 from fastapi import APIRouter, Depends
+from fastapi.responses import ORJSONResponse
 from bson import ObjectId
+from typing import List
 
 from app.services.database import db
 from app.auth.dependency import get_current_user
+from app.models.post import PostCard, FEED_CARD_PROJECTION
 
 router = APIRouter(prefix="/feed", tags=["Feed"])
 
 
-@router.get("/personal")
+@router.get("/personal", responses={200: {"model": List[PostCard]}})
 async def personal_feed(user=Depends(get_current_user)):
     user_id = user["user_id"]
 
@@ -23,7 +26,7 @@ async def personal_feed(user=Depends(get_current_user)):
 
     posts_cursor = (
         db.posts
-        .find({"user_id": {"$in": following_ids}})
+        .find({"user_id": {"$in": following_ids}}, FEED_CARD_PROJECTION)
         .sort("created_at", -1)
         .limit(50)
     )
@@ -52,4 +55,4 @@ async def personal_feed(user=Depends(get_current_user)):
         
         posts.append(post)
 
-    return posts
+    return ORJSONResponse(posts)
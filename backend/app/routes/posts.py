@@ -1,24 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, Form
+from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, Form, Request
+from fastapi.responses import ORJSONResponse
 from datetime import datetime
 from bson import ObjectId
-from typing import Optional
+from typing import List, Optional
 
-from app.models.post import PostCreate
+from app.models.post import PostCreate, PostFromUpload, PostCard, FEED_CARD_PROJECTION
 from app.services.database import db
-from app.auth.dependency import get_current_user
-from app.services.ml_client import analyze_text, generate_context
+from app.auth.dependency import get_current_user, get_user_context, UserContext
+from app.services.ml_client import analyze_text
+from app.services.risk import BLOCK_THRESHOLD
 from app.services.cloudinary_helper import upload_to_cloudinary
+from app.services.direct_upload import verify_upload
+from app.services.http_cache import cached_json_response, invalidate
+from app.services import feed_cache, events
+from app.services.post_enrichment import enrich_posts_for_viewer
+from app.services.entity_catalog import record_post_entities, remove_post_entities
+from app.services import entity_graph
+from app.services.entity_resolution import resolve_canonical_id
+from app.services.context_refresh import refresh_post_context
 
 router = APIRouter(prefix="/posts", tags=["Posts"])
 
 
 # Helper function to create post document
-async def _create_post_common(content: str, user: dict, media_url: str = None, media_type: str = None):
+async def _create_post_common(content: str, ctx: UserContext, media_url: str = None, media_type: str = None):
     """Common post creation logic"""
     
-    # Fetch current username from database (JWT may have stale username after profile update)
-    current_user = await db.users.find_one({"_id": ObjectId(user["user_id"])})
-    username = current_user["username"] if current_user else user["username"]
+    # Current username from the user document (JWT may have stale username after profile update)
+    username = await ctx.get_username()
     
     # 🔍 Analyze content using ML service
     try:
@@ -30,7 +39,7 @@ async def _create_post_common(content: str, user: dict, media_url: str = None, m
         )
 
     # ❌ Block high-risk content
-    if analysis.get("risk_score", 0) > 0.6:
+    if analysis.get("risk_score", 0) > BLOCK_THRESHOLD:
         raise HTTPException(
             status_code=403,
             detail="Post blocked due to sensitive or harmful content"
@@ -38,19 +47,33 @@ async def _create_post_common(content: str, user: dict, media_url: str = None, m
 
     # ✅ Allowed post
     new_post = {
-        "user_id": user["user_id"],
+        "user_id": ctx.user_id,
         "username": username,
         "content": content,
         "entities": analysis.get("entities", []),
         "risk_score": analysis.get("risk_score", 0),
         "context_data": analysis.get("context_data", {}),
+        "model_version": analysis.get("model_version"),
         "media_url": media_url,
         "media_type": media_type,
         "likes": 0,
         "created_at": datetime.utcnow()
     }
+    if analysis.get("analysis_degraded"):
+        # Dictionary and hashtag entities only: the entity backfill re-runs NER
+        new_post["analysis_degraded"] = True
 
     await db.posts.insert_one(new_post)
+    await record_post_entities(new_post["entities"], new_post["created_at"])
+    await entity_graph.record_post(new_post["entities"], new_post["created_at"])
+    invalidate("trending", "entities")
+    await feed_cache.add_post(new_post)
+    await events.publish(events.post_topics(new_post), {
+        "type": "post_created",
+        "post_id": str(new_post["_id"]),
+        "user_id": new_post["user_id"],
+        "username": username
+    })
 
     return {
         "message": "Post created successfully",
@@ -63,19 +86,19 @@ async def _create_post_common(content: str, user: dict, media_url: str = None, m
 @router.post("/")
 async def create_post(
     post: PostCreate,
-    user=Depends(get_current_user)
+    ctx: UserContext = Depends(get_user_context)
 ):
     """
     Create a new text-only post (JSON body).
     """
-    return await _create_post_common(post.content, user)
+    return await _create_post_common(post.content, ctx)
 
 
 @router.post("/with-media")
 async def create_post_with_media(
     content: str = Form(...),
     media: Optional[UploadFile] = File(default=None),
-    user=Depends(get_current_user)
+    ctx: UserContext = Depends(get_user_context)
 ):
     """
     Create a new post with media (multipart/form-data).
@@ -106,63 +129,57 @@ async def create_post_with_media(
         except Exception as e:
             print(f"Media upload failed: {e}")
 
-    return await _create_post_common(content, user, media_url, media_type)
+    return await _create_post_common(content, ctx, media_url, media_type)
 
 
-@router.get("/")
+@router.post("/from-upload")
+async def create_post_from_upload(
+    post: PostFromUpload,
+    ctx: UserContext = Depends(get_user_context)
+):
+    """
+    Create a post with media the client uploaded directly to storage
+    (see POST /media/upload-params). The storage response signature is
+    verified before the asset is attached.
+    """
+    media_url, media_type = await verify_upload(
+        ctx.user_id,
+        post.public_id,
+        post.version,
+        post.signature
+    )
+    return await _create_post_common(post.content, ctx, media_url, media_type)
+
+
+@router.get("/", responses={200: {"model": List[PostCard]}})
 async def get_posts(user=Depends(get_current_user)):
-    user_id = user["user_id"]
-    posts = []
-    async for post in db.posts.find().sort("created_at", -1).limit(100):
-        post["_id"] = str(post["_id"])
-        post_id = post["_id"]
-        
-        # Ensure likes field has a default value
-        post["likes"] = post.get("likes", 0)
-        
-        # Fetch author's profile picture
-        author = await db.users.find_one({"_id": ObjectId(post["user_id"])})
-        post["profile_pic_url"] = author.get("profile_pic_url") if author else None
-        
-        # Add comment count
-        comment_count = await db.comments.count_documents({"post_id": post_id})
-        post["comment_count"] = comment_count
-        
-        # Check if user liked this post
-        is_liked = await db.likes.find_one({
-            "post_id": post_id,
-            "user_id": user_id
-        })
-        post["is_liked_by_user"] = bool(is_liked)
-        
-        # Check if user is following the post author
-        if post["user_id"] != user_id:
-            is_following = await db.follows.find_one({
-                "follower_id": user_id,
-                "following_id": post["user_id"]
-            })
-            post["is_followed_by_user"] = bool(is_following)
-        else:
-            post["is_followed_by_user"] = False
-        
-        # Check if user bookmarked this post
-        is_bookmarked = await db.bookmarks.find_one({
-            "post_id": post_id,
-            "user_id": user_id
-        })
-        post["is_bookmarked"] = bool(is_bookmarked)
-        
-        posts.append(post)
+    # Newest posts come from the shared feed cache; only viewer flags are per request
+    posts = await feed_cache.get_newest_posts(100)
+    posts = await enrich_posts_for_viewer(posts, user["user_id"])
 
-    return posts
+    # Documents are already JSON-ready; skip jsonable_encoder
+    return ORJSONResponse(posts)
 
 
 @router.get("/{post_id}")
-async def get_post_by_id(post_id: str, user=Depends(get_current_user)):
+async def get_post_by_id(post_id: str, request: Request, user=Depends(get_current_user)):
     # 1. Validate the ID format
     if not ObjectId.is_valid(post_id):
         raise HTTPException(status_code=400, detail="Invalid post ID")
 
+    # Per-viewer flags make the body user specific, so it is cached per user
+    # and marked private; clients revalidate with If-None-Match.
+    return await cached_json_response(
+        request,
+        key=f"post:{post_id}:{user['user_id']}",
+        build=lambda: _build_post_detail(post_id, user),
+        scopes=[f"post:{post_id}"],
+        cache_control="private, no-cache",
+        ttl=30
+    )
+
+
+async def _build_post_detail(post_id: str, user: dict):
     # 2. Fetch from Database
     post = await db.posts.find_one({"_id": ObjectId(post_id)})
     
@@ -212,7 +229,10 @@ async def delete_post(post_id: str, user=Depends(get_current_user)):
         raise HTTPException(status_code=403, detail="You can only delete your own posts")
 
     # 4. Delete the post
-    await db.posts.delete_one({"_id": ObjectId(post_id)})
+    result = await db.posts.delete_one({"_id": ObjectId(post_id)})
+    if result.deleted_count:
+        await remove_post_entities(post.get("entities", []))
+        await entity_graph.remove_post(post.get("entities", []), post["created_at"])
     
     # 5. Also delete associated comments
     await db.comments.delete_many({"post_id": post_id})
@@ -220,6 +240,9 @@ async def delete_post(post_id: str, user=Depends(get_current_user)):
     # 6. Delete associated likes
     await db.likes.delete_many({"post_id": post_id})
 
+    invalidate(f"post:{post_id}", f"comments:{post_id}", "trending", "entities")
+    await feed_cache.remove_post(post_id)
+
     return {"message": "Post deleted successfully"}
 
 
@@ -231,10 +254,11 @@ async def get_related_posts(entity_text: str, user=Depends(get_current_user)):
     """
     user_id = user["user_id"]
     
-    # Query posts where entities array contains matching entity text
+    # Query posts mentioning the entity under any alias
+    entity_id = await resolve_canonical_id(entity_text)
     cursor = (
         db.posts
-        .find({"entities.text": {"$regex": f"^{entity_text}$", "$options": "i"}})
+        .find({"entities.canonical_id": entity_id}, FEED_CARD_PROJECTION)
         .sort("created_at", -1)
         .limit(50)
     )
@@ -263,18 +287,19 @@ async def get_related_posts(entity_text: str, user=Depends(get_current_user)):
         
         posts.append(post)
     
-    return {
+    return ORJSONResponse({
         "entity": entity_text,
         "count": len(posts),
         "posts": posts
-    }
+    })
 
 
 @router.post("/{post_id}/regenerate-context")
 async def regenerate_post_context(post_id: str, user=Depends(get_current_user)):
     """
     Regenerate the Pulse Context for a post.
-    This re-fetches Wikipedia and news data for the post's entities.
+    Refreshes the post's entities that have stale context (shared with every
+    other post mentioning them) and recomposes the post's context from them.
     """
     if not ObjectId.is_valid(post_id):
         raise HTTPException(status_code=400, detail="Invalid post ID")
@@ -283,20 +308,11 @@ async def regenerate_post_context(post_id: str, user=Depends(get_current_user)):
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     
-    entities = post.get("entities", [])
-    content = post.get("content", "")
-    
-    if not entities:
+    if not post.get("entities"):
         raise HTTPException(status_code=400, detail="No entities found in post")
     
     try:
-        new_context = await generate_context(entities, content)
-        
-        # Update the post with new context
-        await db.posts.update_one(
-            {"_id": ObjectId(post_id)},
-            {"$set": {"context_data": new_context}}
-        )
+        new_context = await refresh_post_context(post)
         
         return {
             "message": "Context regenerated successfully",
@@ -12,7 +12,7 @@ async def search_posts(q: str, user=Depends(get_current_user)):
 
     try:
         # 1. Analyze query using your ML client (NER)
-        analysis = await analyze_text(q)
+        analysis = await analyze_text(q, with_context=False)
         extracted_entities = analysis.get("entities", [])
         
         # 2. Hybrid Query Logic
@@ -22,9 +22,10 @@ async def search_posts(q: str, user=Depends(get_current_user)):
         ]
         
         if extracted_entities:
-            entity_texts = [ent["text"] for ent in extracted_entities]
+            # Match every alias of the detected entities via canonical ids
+            entity_ids = [ent["canonical_id"] for ent in extracted_entities if ent.get("canonical_id")]
             query_conditions.append({
-                "entities.text": {"$in": entity_texts}
+                "entities.canonical_id": {"$in": entity_ids}
             })
             
         mongo_query = {"$or": query_conditions}
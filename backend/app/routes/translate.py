@@ -1,19 +1,90 @@
+import asyncio
+import hashlib
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
+from typing import List
 from deep_translator import GoogleTranslator
+from starlette.concurrency import run_in_threadpool
 from app.auth.dependency import get_current_user
+from app.services.cache import TTLCache
+from app.services.upstream import UpstreamUnavailable, get_upstream
 
 router = APIRouter(prefix="/translate", tags=["Translation"])
 
+# Translations keyed by (sha256 of text, target_lang)
+_translation_cache = TTLCache(maxsize=5000, ttl=24 * 60 * 60)
+
+# Max concurrent upstream translation calls per worker
+_translate_slots = asyncio.Semaphore(8)
+
+_upstream = get_upstream("google_translate")
+
+MAX_BATCH_SIZE = 50
+
+
 class TranslationRequest(BaseModel):
     text: str
     target_lang: str = "en"
 
+
+class BatchTranslationRequest(BaseModel):
+    texts: List[str]
+    target_lang: str = "en"
+
+
+async def _translate(text: str, target_lang: str) -> str:
+    """Translate one text, served from cache when possible."""
+    key = (hashlib.sha256(text.encode("utf-8")).hexdigest(), target_lang)
+    cached = _translation_cache.get(key)
+    if cached is not None:
+        return cached
+
+    # GoogleTranslator is synchronous; run it in the thread pool
+    async with _translate_slots:
+        translated = await _upstream.call(lambda: run_in_threadpool(
+            GoogleTranslator(source='auto', target=target_lang).translate,
+            text
+        ))
+
+    if translated is not None:
+        _translation_cache.set(key, translated)
+    return translated
+
+
 @router.post("/")
 async def translate_text(request: TranslationRequest, user=Depends(get_current_user)):
     try:
         # GoogleTranslator handles Indian languages (hi, bn, kn, mr) automatically
-        translated = GoogleTranslator(source='auto', target=request.target_lang).translate(request.text)
+        translated = await _translate(request.text, request.target_lang)
         return {"translated_text": translated}
+    except UpstreamUnavailable:
+        raise HTTPException(status_code=503, detail="Translation is temporarily unavailable")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/batch")
+async def translate_batch(request: BatchTranslationRequest, user=Depends(get_current_user)):
+    """
+    Translate several texts in one request (e.g. a whole feed page).
+    Results are returned in the same order as `texts`.
+    """
+    if len(request.texts) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_BATCH_SIZE} texts per batch"
+        )
+
+    # Translate each distinct text once
+    unique_texts = list(dict.fromkeys(request.texts))
+    try:
+        results = await asyncio.gather(
+            *(_translate(text, request.target_lang) for text in unique_texts)
+        )
+    except UpstreamUnavailable:
+        raise HTTPException(status_code=503, detail="Translation is temporarily unavailable")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    translated = dict(zip(unique_texts, results))
+    return {"translations": [translated[text] for text in request.texts]}
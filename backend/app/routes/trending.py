@@ -1,39 +1,54 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 from collections import Counter
 from datetime import datetime, timedelta
 from app.services.database import db
+from app.services.http_cache import cached_json_response
 
 router = APIRouter(prefix="/trending", tags=["Trending"])
 
 @router.get("/")
-async def trending_topics():
+async def trending_topics(request: Request):
+    return await cached_json_response(
+        request,
+        key="trending",
+        build=_compute_trending,
+        scopes=["trending"],
+        cache_control="public, max-age=60, stale-while-revalidate=120"
+    )
+
+
+async def _compute_trending():
     since = datetime.utcnow() - timedelta(hours=24)
 
     # Fetch posts from the last 24 hours
     cursor = db.posts.find(
-        {"created_at": {"$gte": since}}
+        {"created_at": {"$gte": since}},
+        {"entities": 1}
     )
 
-    # We store tuples of (text, label) to keep context
-    entity_data = []
+    # Count per canonical entity so aliases ("Modi", "मोदी", "#NaMo") merge
+    counter = Counter()
+    labels = {}
+    names = {}
 
     async for post in cursor:
         for ent in post.get("entities", []):
             # We filter for significant labels only
             if ent.get("label") in ["PER", "ORG", "GPE", "LOC"]:
-                entity_data.append((ent["text"], ent["label"]))
-
-    # Count occurrences
-    counter = Counter(entity_data)
+                cid = ent.get("canonical_id") or ent["text"]
+                counter[cid] += 1
+                labels.setdefault(cid, ent["label"])
+                names.setdefault(cid, ent.get("canonical_name") or ent["text"])
 
     # Format the top 10 results
     trending = [
         {
-            "topic": item[0], 
-            "label": item[1], 
+            "topic": names[cid], 
+            "label": labels[cid], 
+            "canonical_id": cid,
             "count": count
         }
-        for item, count in counter.most_common(10)
+        for cid, count in counter.most_common(10)
     ]
 
-    return trending
\ No newline at end of file
+    return trending
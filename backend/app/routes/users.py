@@ -1,19 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, Form
+from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, Form, BackgroundTasks
 from bson import ObjectId
 from typing import Optional
 
 from app.services.database import db
-from app.auth.dependency import get_current_user
+from app.auth.dependency import get_current_user, get_user_context, UserContext
 from app.services.cloudinary_helper import upload_profile_picture
+from app.services.rename_jobs import start_rename_job, run_rename_job, get_latest_rename_job
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
 # --- EXISTING: Get My Profile ---
 @router.get("/me")
-async def my_profile(user=Depends(get_current_user)):
-    user_data = await db.users.find_one(
-        {"_id": ObjectId(user["user_id"])}
-    )
+async def my_profile(ctx: UserContext = Depends(get_user_context)):
+    user_data = await ctx.get_document()
 
     if not user_data:
         return {"error": "User not found"}
@@ -27,6 +26,7 @@ async def my_profile(user=Depends(get_current_user)):
 # --- UPDATE: Update My Profile ---
 @router.put("/me")
 async def update_my_profile(
+    background_tasks: BackgroundTasks,
     username: Optional[str] = Form(None),
     bio: Optional[str] = Form(None),
     profile_picture: Optional[UploadFile] = File(None),
@@ -35,6 +35,8 @@ async def update_my_profile(
     """
     Update current user's profile.
     Supports updating username, bio, and profile picture.
+    A username change is copied onto existing posts and comments by a
+    background job (see GET /users/me/rename-status).
     """
     user_id = user["user_id"]
     update_data = {}
@@ -50,12 +52,6 @@ async def update_my_profile(
         if existing:
             raise HTTPException(status_code=400, detail="Username already taken")
         update_data["username"] = username
-        
-        # Also update username in all posts by this user
-        await db.posts.update_many(
-            {"user_id": user_id},
-            {"$set": {"username": username}}
-        )
     
     # Update bio
     if bio is not None:
@@ -78,6 +74,12 @@ async def update_my_profile(
     if result.modified_count == 0:
         raise HTTPException(status_code=500, detail="Failed to update profile")
     
+    # Propagate the new username to posts/comments in the background
+    rename_job_id = None
+    if "username" in update_data:
+        rename_job_id = await start_rename_job(user_id, update_data["username"])
+        background_tasks.add_task(run_rename_job, rename_job_id)
+    
     # Return updated user data
     updated_user = await db.users.find_one({"_id": ObjectId(user_id)})
     updated_user["_id"] = str(updated_user["_id"])
@@ -85,10 +87,23 @@ async def update_my_profile(
     
     return {
         "message": "Profile updated successfully",
-        "user": updated_user
+        "user": updated_user,
+        "rename_job_id": rename_job_id
     }
 
 
+# --- Username propagation progress ---
+@router.get("/me/rename-status")
+async def my_rename_status(user=Depends(get_current_user)):
+    """
+    Progress of the latest username propagation job for the current user.
+    """
+    job = await get_latest_rename_job(user["user_id"])
+    if not job:
+        return {"status": "none"}
+    return job
+
+
 # --- NEW: Get Any User Profile by Username ---
 @router.get("/{username}")
 async def get_user_profile(username: str, user=Depends(get_current_user)):
@@ -102,7 +117,7 @@ async def get_user_profile(username: str, user=Depends(get_current_user)):
     # 2. Calculate Stats
     followers = await db.follows.count_documents({"following_id": target_user_id})
     following = await db.follows.count_documents({"follower_id": target_user_id})
-    post_count = await db.posts.count_documents({"username": username})
+    post_count = await db.posts.count_documents({"user_id": target_user_id})
 
     # 3. Check if CURRENT user is following TARGET user
     is_following = await db.follows.find_one({
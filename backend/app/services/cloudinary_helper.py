@@ -3,12 +3,19 @@ Cloudinary Upload Helper
 
 Handles file uploads to Cloudinary and returns the URL.
 Supports images and videos.
+
+The Cloudinary SDK is synchronous, so uploads run in the thread pool and
+never block the event loop. Files are passed to the SDK as file objects
+(Starlette spools large uploads to disk) instead of being read into memory,
+and videos go through `upload_large` in chunks.
 """
 
+import asyncio
+import os
 import cloudinary
 import cloudinary.uploader
 from fastapi import UploadFile, HTTPException
-import os
+from starlette.concurrency import run_in_threadpool
 from typing import Optional, Tuple
 from dotenv import load_dotenv
 
@@ -23,6 +30,43 @@ cloudinary.config(
     secure=True
 )
 
+# Upload limits (bytes)
+MAX_IMAGE_SIZE = int(os.getenv("MAX_IMAGE_UPLOAD_BYTES", 10 * 1024 * 1024))
+MAX_VIDEO_SIZE = int(os.getenv("MAX_VIDEO_UPLOAD_BYTES", 100 * 1024 * 1024))
+
+# Chunk size for upload_large (Cloudinary minimum is 5MB)
+UPLOAD_CHUNK_SIZE = int(os.getenv("CLOUDINARY_CHUNK_BYTES", 20 * 1024 * 1024))
+
+# Max simultaneous uploads per worker; extra uploads wait for a free slot
+MAX_CONCURRENT_UPLOADS = int(os.getenv("MAX_CONCURRENT_UPLOADS", 4))
+_upload_slots = asyncio.Semaphore(MAX_CONCURRENT_UPLOADS)
+
+ALLOWED_IMAGE_TYPES = ["image/jpeg", "image/png", "image/gif", "image/webp"]
+ALLOWED_VIDEO_TYPES = ["video/mp4", "video/webm", "video/quicktime", "video/x-msvideo"]
+
+
+def _check_file_size(file: UploadFile, max_size: int):
+    """
+    Reject files over `max_size` using the spooled file's length,
+    without reading its contents.
+    """
+    file.file.seek(0, os.SEEK_END)
+    size = file.file.tell()
+    file.file.seek(0)
+
+    if size > max_size:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File too large. Maximum size is {max_size // (1024 * 1024)}MB"
+        )
+    return size
+
+
+async def _run_upload(upload_fn, file_obj, **options) -> dict:
+    """Run a blocking Cloudinary upload in the thread pool, capped per worker."""
+    async with _upload_slots:
+        return await run_in_threadpool(upload_fn, file_obj, **options)
+
 
 async def upload_to_cloudinary(
     file: UploadFile,
@@ -44,9 +88,7 @@ async def upload_to_cloudinary(
         HTTPException: If upload fails or file type is not supported
     """
     # Validate file type
-    allowed_image_types = ["image/jpeg", "image/png", "image/gif", "image/webp"]
-    allowed_video_types = ["video/mp4", "video/webm", "video/quicktime", "video/x-msvideo"]
-    allowed_types = allowed_image_types + allowed_video_types
+    allowed_types = ALLOWED_IMAGE_TYPES + ALLOWED_VIDEO_TYPES
     
     if file.content_type not in allowed_types:
         raise HTTPException(
@@ -55,26 +97,34 @@ async def upload_to_cloudinary(
         )
     
     # Determine media type
-    if file.content_type in allowed_image_types:
+    if file.content_type in ALLOWED_IMAGE_TYPES:
         media_type = "image"
     else:
         media_type = "video"
     
+    _check_file_size(file, MAX_IMAGE_SIZE if media_type == "image" else MAX_VIDEO_SIZE)
+    
     try:
-        # Read file contents
-        contents = await file.read()
-        
-        # Upload to Cloudinary
-        # Using upload_large for potential video support
-        result = cloudinary.uploader.upload(
-            contents,
-            folder=folder,
-            resource_type=resource_type,
-            transformation={
-                "quality": "auto",
-                "fetch_format": "auto"
-            } if media_type == "image" else None
-        )
+        if media_type == "video":
+            # Videos are sent in chunks straight from the spooled file
+            result = await _run_upload(
+                cloudinary.uploader.upload_large,
+                file.file,
+                folder=folder,
+                resource_type="video",
+                chunk_size=UPLOAD_CHUNK_SIZE
+            )
+        else:
+            result = await _run_upload(
+                cloudinary.uploader.upload,
+                file.file,
+                folder=folder,
+                resource_type=resource_type,
+                transformation={
+                    "quality": "auto",
+                    "fetch_format": "auto"
+                }
+            )
         
         # Return the secure URL and media type
         return result["secure_url"], media_type
@@ -94,20 +144,19 @@ async def upload_profile_picture(file: UploadFile) -> str:
     Returns:
         The secure URL of the uploaded avatar
     """
-    allowed_types = ["image/jpeg", "image/png", "image/gif", "image/webp"]
-    
-    if file.content_type not in allowed_types:
+    if file.content_type not in ALLOWED_IMAGE_TYPES:
         raise HTTPException(
             status_code=400,
             detail=f"Profile picture must be an image (jpeg, png, gif, webp)"
         )
     
+    _check_file_size(file, MAX_IMAGE_SIZE)
+    
     try:
-        contents = await file.read()
-        
         # Upload with avatar-specific transformations
-        result = cloudinary.uploader.upload(
-            contents,
+        result = await _run_upload(
+            cloudinary.uploader.upload,
+            file.file,
             folder="pulse/avatars",
             resource_type="image",
             transformation=[
@@ -133,7 +182,9 @@ async def delete_from_cloudinary(public_id: str, resource_type: str = "image") -
         True if deletion was successful
     """
     try:
-        result = cloudinary.uploader.destroy(public_id, resource_type=resource_type)
+        result = await run_in_threadpool(
+            cloudinary.uploader.destroy, public_id, resource_type=resource_type
+        )
         return result.get("result") == "ok"
     except Exception:
         return False
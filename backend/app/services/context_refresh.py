@@ -0,0 +1,339 @@
+"""
+Context Refresh Scheduler
+
+Keeps the Pulse Context (`context_data`) of recent posts fresh without
+re-running every external fetch per post on each click.
+
+Context is fetched per entity, not per post: the Wikipedia summary and the
+latest headline for "Mumbai" are fetched once, stored in `entity_context`
+(keyed by canonical id) and composed into every recent post mentioning it.
+
+Every REFRESH_INTERVAL seconds the scheduler:
+1. Ranks entities mentioned in posts from the last REFRESH_WINDOW_HOURS by
+   popularity (posts + likes of those posts)
+2. Picks up to REFRESH_BATCH entities whose context is older than
+   CONTEXT_TTL_MINUTES
+3. Refreshes them, at most one in flight per entity and each upstream
+   (Wikipedia, news) limited to a number of requests per second
+4. Recomposes `context_data` for the recent posts mentioning them
+
+An entity whose Wikipedia or news lookup cannot be made (circuit open,
+rate limited, timeout) keeps its stored context and stays stale, so the
+next pass retries it. Posts mentioning such an entity that has no stored
+context yet keep the `context_data` they have.
+
+Every uvicorn worker runs the scheduler, but each pass first takes a lease
+on the `scheduler_leases` document "context_refresh"; only the worker
+holding it runs that pass, so the configured rates apply to the whole
+deployment. A lease outlives a dead worker by at most two intervals.
+
+`POST /posts/{id}/regenerate-context` goes through the same path, so
+concurrent clicks within a worker on posts sharing an entity trigger a
+single fetch. Posts from before canonical ids have no per-entity context
+and get theirs generated directly.
+"""
+
+import asyncio
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from app.services.database import db
+from app.services.http_cache import invalidate
+from app.services.upstream import RateLimiter, UpstreamUnavailable
+from app.services.ml_client import (
+    fetch_google_news,
+    fetch_wikipedia_summaries,
+    generate_context,
+    transliterate_to_english,
+)
+
+REFRESH_INTERVAL = int(os.getenv("CONTEXT_REFRESH_INTERVAL", "300"))
+REFRESH_WINDOW_HOURS = int(os.getenv("CONTEXT_REFRESH_WINDOW_HOURS", "48"))
+REFRESH_BATCH = int(os.getenv("CONTEXT_REFRESH_BATCH", "50"))
+CONTEXT_TTL_MINUTES = int(os.getenv("CONTEXT_TTL_MINUTES", "60"))
+
+# Requests per second allowed to each upstream
+WIKI_RATE = float(os.getenv("CONTEXT_WIKI_RATE", "5"))
+NEWS_RATE = float(os.getenv("CONTEXT_NEWS_RATE", "2"))
+
+# News lookups prefer people, then organisations, then places
+_LABEL_PRIORITY = {"PER": 0, "ORG": 1, "GPE": 2, "LOC": 2}
+
+
+_wiki_limiter = RateLimiter(WIKI_RATE)
+_news_limiter = RateLimiter(NEWS_RATE)
+
+# canonical_id -> refresh task, so one entity is never fetched twice at once
+_inflight: Dict[str, asyncio.Task] = {}
+_scheduler_task = None
+
+SCHEDULER_LEASE = "context_refresh"
+_OWNER = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def _is_stale(doc: dict, now: datetime) -> bool:
+    return doc is None or doc["refreshed_at"] < now - timedelta(minutes=CONTEXT_TTL_MINUTES)
+
+
+async def _fetch_entity_context(entity_id: str, ent: dict) -> dict:
+    """
+    Fetch Wikipedia and news for one entity and store the result. Raises
+    UpstreamUnavailable, leaving the stored context as it was, when either
+    lookup cannot be made.
+    """
+    text = ent["text"]
+    english = ent.get("identified_as") or ent.get("canonical_name")
+    if not english:
+        english = await transliterate_to_english(text)
+
+    # English name and original text resolved in one request
+    await _wiki_limiter.wait()
+    summaries = await fetch_wikipedia_summaries([english, text], fallback=False)
+    wiki = summaries[english] or summaries[text]
+
+    # Keep only headlines that actually mention the entity
+    names = {text, english}
+    await _news_limiter.wait()
+    news = await fetch_google_news(english, entity_names=list(names), fallback=False)
+    if news and not any(name.lower() in news["headline"].lower() for name in names):
+        news = None
+
+    doc = {
+        "text": text,
+        "english": english,
+        "label": ent.get("label", "MISC"),
+        "wiki": {"title": wiki["title"], "description": wiki["description"]} if wiki else None,
+        "news": news,
+        "refreshed_at": datetime.utcnow()
+    }
+    await db.entity_context.update_one({"_id": entity_id}, {"$set": doc}, upsert=True)
+    return {"_id": entity_id, **doc}
+
+
+async def refresh_entity(entity_id: str, ent: dict) -> dict:
+    """Refresh one entity's context, joining a refresh already in flight."""
+    task = _inflight.get(entity_id)
+    if task is None:
+        task = asyncio.create_task(_fetch_entity_context(entity_id, ent))
+        _inflight[entity_id] = task
+        task.add_done_callback(lambda _: _inflight.pop(entity_id, None))
+    return await asyncio.shield(task)
+
+
+async def get_entity_contexts(entities: list, refresh_stale: bool = True) -> Dict[str, dict]:
+    """Stored context per canonical id, refreshing missing or stale ones."""
+    by_id = {}
+    for ent in entities:
+        if ent.get("canonical_id") and ent.get("text"):
+            by_id.setdefault(ent["canonical_id"], ent)
+
+    now = datetime.utcnow()
+    contexts = {
+        doc["_id"]: doc
+        async for doc in db.entity_context.find({"_id": {"$in": list(by_id)}})
+    }
+
+    if refresh_stale:
+        stale = [cid for cid in by_id if _is_stale(contexts.get(cid), now)]
+        results = await asyncio.gather(
+            *(refresh_entity(cid, by_id[cid]) for cid in stale),
+            return_exceptions=True
+        )
+        for cid, result in zip(stale, results):
+            if isinstance(result, Exception):
+                print(f"Context Refresh Error ({cid}): {result}")
+            else:
+                contexts[cid] = result
+
+    return contexts
+
+
+def _missing_context(entities: list, contexts: Dict[str, dict], among=None) -> bool:
+    """True if an entity (of the ids `among`, if given) has no stored context."""
+    return any(
+        ent.get("canonical_id") and ent.get("text") and ent["canonical_id"] not in contexts
+        and (among is None or ent["canonical_id"] in among)
+        for ent in entities
+    )
+
+
+def compose_context(entities: list, contexts: Dict[str, dict]) -> dict:
+    """Build a post's `context_data` from its entities' stored context."""
+    context = {
+        "is_generated": False,
+        "disambiguation": [],
+        "news": None
+    }
+
+    seen = set()
+    for ent in entities:
+        doc = contexts.get(ent.get("canonical_id"))
+        if not doc or ent["text"] in seen:
+            continue
+        seen.add(ent["text"])
+        if doc.get("wiki"):
+            context["disambiguation"].append({
+                "entity": ent["text"],
+                "identified_as": doc["wiki"]["title"],
+                "description": doc["wiki"]["description"]
+            })
+            context["is_generated"] = True
+
+    ranked = sorted(
+        (ent for ent in entities if ent.get("canonical_id") in contexts),
+        key=lambda ent: _LABEL_PRIORITY.get(ent.get("label"), 3)
+    )
+    for ent in ranked:
+        news = contexts[ent["canonical_id"]].get("news")
+        if news:
+            context["news"] = news
+            context["is_generated"] = True
+            break
+
+    return context
+
+
+async def refresh_post_context(post: dict) -> dict:
+    """Recompose one post's context now (used by regenerate-context)."""
+    entities = post.get("entities", [])
+    if any(ent.get("canonical_id") for ent in entities):
+        contexts = await get_entity_contexts(entities)
+        if _missing_context(entities, contexts) and post.get("context_data"):
+            # An entity's lookups could not be made: keep what the post has
+            return post["context_data"]
+        context = compose_context(entities, contexts)
+    else:
+        # Analyzed before canonical ids: no stored per-entity context to use
+        context = await generate_context(entities, post.get("content", ""))
+    await db.posts.update_one(
+        {"_id": post["_id"]},
+        {"$set": {"context_data": context, "context_refreshed_at": datetime.utcnow()}}
+    )
+    invalidate(f"post:{post['_id']}")
+    return context
+
+
+async def _stale_popular_entities(now: datetime) -> List[dict]:
+    """Entities of recent posts ranked by popularity, stale ones only."""
+    since = now - timedelta(hours=REFRESH_WINDOW_HOURS)
+    pipeline = [
+        {"$match": {"created_at": {"$gte": since}, "entities.0": {"$exists": True}}},
+        {"$project": {"entities": 1, "likes": 1}},
+        {"$unwind": "$entities"},
+        {"$match": {"entities.canonical_id": {"$exists": True}}},
+        {"$group": {
+            "_id": "$entities.canonical_id",
+            "entity": {"$first": "$entities"},
+            "popularity": {"$sum": {"$add": [1, {"$ifNull": ["$likes", 0]}]}}
+        }},
+        {"$sort": {"popularity": -1}},
+        {"$limit": REFRESH_BATCH * 4}
+    ]
+    candidates = await db.posts.aggregate(pipeline).to_list(length=None)
+
+    fresh_before = now - timedelta(minutes=CONTEXT_TTL_MINUTES)
+    fresh = {
+        doc["_id"]
+        async for doc in db.entity_context.find(
+            {"_id": {"$in": [c["_id"] for c in candidates]}, "refreshed_at": {"$gte": fresh_before}},
+            {"_id": 1}
+        )
+    }
+    return [c for c in candidates if c["_id"] not in fresh][:REFRESH_BATCH]
+
+
+async def run_refresh_cycle():
+    """One scheduler pass: refresh stale popular entities, then their posts."""
+    now = datetime.utcnow()
+    stale = await _stale_popular_entities(now)
+    if not stale:
+        return
+
+    # Popularity order: the most-read entities reach the rate limiters first
+    refreshed = []
+    unavailable = set()
+    for item in stale:
+        try:
+            await refresh_entity(item["_id"], item["entity"])
+            refreshed.append(item["_id"])
+        except UpstreamUnavailable as e:
+            print(f"Context Refresh Skipped ({item['_id']}): {e}")
+            unavailable.add(item["_id"])
+        except Exception as e:
+            print(f"Context Refresh Error ({item['_id']}): {e}")
+
+    if not refreshed:
+        return
+
+    since = now - timedelta(hours=REFRESH_WINDOW_HOURS)
+    posts = await db.posts.find(
+        {"entities.canonical_id": {"$in": refreshed}, "created_at": {"$gte": since}},
+        {"entities": 1}
+    ).to_list(length=None)
+    contexts = await get_entity_contexts(
+        [ent for post in posts for ent in post["entities"]],
+        refresh_stale=False
+    )
+
+    updates = []
+    for post in posts:
+        if _missing_context(post["entities"], contexts, among=unavailable):
+            # Composing now would drop what the post has for that entity
+            continue
+        updates.append(UpdateOne(
+            {"_id": post["_id"]},
+            {"$set": {
+                "context_data": compose_context(post["entities"], contexts),
+                "context_refreshed_at": now
+            }}
+        ))
+        invalidate(f"post:{post['_id']}")
+    if updates:
+        await db.posts.bulk_write(updates, ordered=False)
+
+
+async def _acquire_lease() -> bool:
+    """Take or renew the scheduler lease; False if another worker holds it."""
+    now = datetime.utcnow()
+    try:
+        lease = await db.scheduler_leases.find_one_and_update(
+            {"_id": SCHEDULER_LEASE, "$or": [{"owner": _OWNER}, {"lease_until": {"$lt": now}}]},
+            {"$set": {"owner": _OWNER, "lease_until": now + timedelta(seconds=REFRESH_INTERVAL * 2)}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        # The upsert lost to a lease held by another worker
+        return False
+    return lease is not None and lease["owner"] == _OWNER
+
+
+async def _scheduler_loop():
+    while True:
+        try:
+            if await _acquire_lease():
+                await run_refresh_cycle()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Context Scheduler Error: {e}")
+        await asyncio.sleep(REFRESH_INTERVAL)
+
+
+async def start():
+    """Start the periodic refresh (called on startup)."""
+    global _scheduler_task
+    if REFRESH_INTERVAL <= 0 or _scheduler_task is not None:
+        return
+    await db.entity_context.create_index([("refreshed_at", 1)])
+    _scheduler_task = asyncio.create_task(_scheduler_loop())
+
+
+if __name__ == "__main__":
+    asyncio.run(run_refresh_cycle())
+    print("Context refresh cycle complete")
@@ -0,0 +1,173 @@
+"""
+Direct Upload Helper
+
+Lets clients upload media straight to storage instead of proxying the bytes
+through the API workers:
+
+1. The client asks for signed upload parameters (`issue_upload_params`).
+2. The client uploads the file directly to `upload_url` with those params.
+3. The client finalizes the post with the storage response; the backend
+   verifies the response signature (`verify_upload`) and attaches the asset.
+
+Two storage backends are supported, selected by MEDIA_STORAGE_BACKEND:
+- "cloudinary" (default): signed Cloudinary uploads, using the credentials
+  configured in `cloudinary_helper`.
+- "local": a stand-in that stores files on disk under LOCAL_MEDIA_DIR and
+  signs with JWT_SECRET, for development and tests without Cloudinary.
+"""
+
+import hashlib
+import hmac
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+from fastapi import HTTPException
+from typing import Tuple
+
+import cloudinary
+import cloudinary.utils
+
+# Importing the helper applies the Cloudinary credentials
+import app.services.cloudinary_helper  # noqa: F401
+from app.services.database import db
+from app.config import JWT_SECRET
+
+STORAGE_BACKEND = os.getenv("MEDIA_STORAGE_BACKEND", "cloudinary")
+LOCAL_MEDIA_DIR = os.getenv("LOCAL_MEDIA_DIR", "local_media")
+LOCAL_MEDIA_URL = "/media/files"
+
+# How long issued upload parameters stay valid
+UPLOAD_TTL_SECONDS = int(os.getenv("DIRECT_UPLOAD_TTL_SECONDS", 600))
+
+UPLOAD_FOLDER = "pulse/posts"
+
+
+def _local_signature(*parts) -> str:
+    message = "|".join(str(p) for p in parts).encode()
+    return hmac.new(JWT_SECRET.encode(), message, hashlib.sha256).hexdigest()
+
+
+async def issue_upload_params(user_id: str, media_type: str) -> dict:
+    """
+    Create short-lived signed parameters for a direct upload and remember
+    the pending upload so only this user can finalize it.
+    """
+    if media_type not in ("image", "video"):
+        raise HTTPException(status_code=400, detail="media_type must be 'image' or 'video'")
+
+    public_id = f"{user_id}_{uuid.uuid4().hex}"
+    timestamp = int(time.time())
+    expires_at = datetime.utcnow() + timedelta(seconds=UPLOAD_TTL_SECONDS)
+
+    await db.pending_uploads.insert_one({
+        "public_id": public_id,
+        "user_id": user_id,
+        "media_type": media_type,
+        "created_at": datetime.utcnow(),
+        "expires_at": expires_at
+    })
+
+    if STORAGE_BACKEND == "local":
+        expires = timestamp + UPLOAD_TTL_SECONDS
+        return {
+            "backend": "local",
+            "upload_url": "/media/local-upload",
+            "fields": {
+                "public_id": public_id,
+                "expires": expires,
+                "token": _local_signature(public_id, expires)
+            },
+            "expires_at": expires_at
+        }
+
+    config = cloudinary.config()
+    params = {
+        "folder": UPLOAD_FOLDER,
+        "public_id": public_id,
+        "timestamp": timestamp
+    }
+    signature = cloudinary.utils.api_sign_request(params, config.api_secret)
+
+    return {
+        "backend": "cloudinary",
+        "upload_url": f"https://api.cloudinary.com/v1_1/{config.cloud_name}/{media_type}/upload",
+        "fields": {
+            **params,
+            "api_key": config.api_key,
+            "signature": signature
+        },
+        "expires_at": expires_at
+    }
+
+
+def sign_local_upload(public_id: str, expires: int, token: str) -> dict:
+    """
+    Validate a local stand-in upload request and return the response
+    signature a client passes back when finalizing.
+    """
+    if not hmac.compare_digest(token, _local_signature(public_id, expires)):
+        raise HTTPException(status_code=403, detail="Invalid upload token")
+    if int(expires) < time.time():
+        raise HTTPException(status_code=403, detail="Upload parameters expired")
+
+    version = int(time.time())
+    return {
+        "public_id": public_id,
+        "version": version,
+        "signature": _local_signature(public_id, version)
+    }
+
+
+def local_media_path(public_id: str) -> str:
+    return os.path.join(LOCAL_MEDIA_DIR, public_id)
+
+
+async def verify_upload(user_id: str, public_id: str, version: int, signature: str) -> Tuple[str, str]:
+    """
+    Verify a finished direct upload and claim it.
+
+    Returns:
+        Tuple of (url, media_type)
+
+    Raises:
+        HTTPException: If the upload is unknown, expired, owned by another
+        user, or the storage signature does not match
+    """
+    pending = await db.pending_uploads.find_one({
+        "public_id": public_id,
+        "user_id": user_id
+    })
+    if not pending:
+        raise HTTPException(status_code=404, detail="Upload not found")
+
+    # `version` is the upload's unix timestamp; it must fall inside the window
+    if version > (pending["expires_at"] - datetime(1970, 1, 1)).total_seconds():
+        raise HTTPException(status_code=400, detail="Upload expired")
+
+    media_type = pending["media_type"]
+
+    if STORAGE_BACKEND == "local":
+        if not hmac.compare_digest(signature, _local_signature(public_id, version)):
+            raise HTTPException(status_code=400, detail="Invalid upload signature")
+        if not os.path.exists(local_media_path(public_id)):
+            raise HTTPException(status_code=400, detail="Uploaded file not found")
+        url = f"{LOCAL_MEDIA_URL}/{public_id}"
+    else:
+        full_public_id = f"{UPLOAD_FOLDER}/{public_id}"
+        if not cloudinary.utils.verify_api_response_signature(full_public_id, version, signature):
+            raise HTTPException(status_code=400, detail="Invalid upload signature")
+
+        url, _ = cloudinary.utils.cloudinary_url(
+            full_public_id,
+            resource_type=media_type,
+            version=version,
+            secure=True
+        )
+
+    # Claim the upload so it can only be attached to one post
+    claimed = await db.pending_uploads.delete_one({"_id": pending["_id"]})
+    if claimed.deleted_count == 0:
+        raise HTTPException(status_code=409, detail="Upload already attached")
+
+    return url, media_type
@@ -0,0 +1,260 @@
+"""
+Entity Backfill
+
+Re-analyzes stored posts with the current NER model (e.g. after shipping a
+new `models/ner_model`) and rewrites their `entities`, `risk_score` and
+`model_version`.
+
+    python -m app.services.entity_backfill [--dry-run] [--workers 4]
+        [--chunk-size 128] [--rate 200] [--job entities] [--restart]
+        [--skip-version ner_model@1a2b3c4d5e] [--degraded-only]
+
+- Posts are streamed in `_id` order and sent to the ML service's
+  /analyze/batch one chunk per call, then merged with dictionary, hashtag
+  and mention entities exactly like new posts.
+- `--workers` chunks are analyzed concurrently; `--rate` caps posts per
+  second so the ML service keeps headroom for live traffic.
+- Changed posts are written with one bulk_write per chunk.
+- Progress is checkpointed in `backfill_jobs` as the last `_id` below which
+  every chunk is done, so an interrupted run resumes where it stopped.
+  `--restart` starts over.
+- `--dry-run` writes nothing and prints the entity diff of changed posts.
+- `--skip-version` leaves out posts already analyzed by that model version.
+- `--degraded-only` re-analyzes only posts stored without model entities
+  because the ML service was unavailable (`analysis_degraded`), e.g.
+  `--degraded-only --job degraded --restart` after an ML outage. Any
+  re-analyzed post has the mark removed.
+
+A run that changed posts rebuilds the entity catalog and co-occurrence
+graph at the end. Pulse Context is left to the context scheduler.
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime
+from typing import List, Optional
+from pymongo import UpdateOne
+
+from app.services.database import db
+from app.services import feed_cache
+from app.services.entity_catalog import rebuild_catalog
+from app.services.entity_graph import rebuild_graph
+from app.services.entity_resolution import assign_canonical_ids
+from app.services.ml_client import analyze_entities_batch
+from app.services.risk import get_risk_scorer
+from app.services.upstream import RateLimiter
+
+MAX_RETRIES = 3
+
+POST_FIELDS = {
+    "content": 1, "entities": 1, "risk_score": 1, "context_data": 1,
+    "model_version": 1, "analysis_degraded": 1
+}
+
+
+def entity_diff(old: list, new: list):
+    """(added, removed) entities as "text/LABEL" strings."""
+    old_keys = {f"{ent['text']}/{ent.get('label')}" for ent in old}
+    new_keys = {f"{ent['text']}/{ent.get('label')}" for ent in new}
+    return sorted(new_keys - old_keys), sorted(old_keys - new_keys)
+
+
+def _post_update(post: dict, fields: dict) -> dict:
+    """`$set` the re-analysis result, clearing a degraded mark."""
+    update = {"$set": fields}
+    if post.get("analysis_degraded"):
+        update["$unset"] = {"analysis_degraded": ""}
+    return update
+
+
+class _Checkpoint:
+    """
+    Chunks finish out of order across workers; the stored checkpoint only
+    advances past a chunk once every earlier chunk is done as well.
+    """
+
+    def __init__(self, job: str, state: Optional[dict], dry_run: bool):
+        self.job = job
+        self.dry_run = dry_run
+        self.last_id = state["last_id"] if state else None
+        self.processed = state["processed"] if state else 0
+        self.changed = state["changed"] if state else 0
+        self._next_seq = 0
+        self._done = {}
+
+    async def complete(self, seq: int, last_id, processed: int, changed: int):
+        self._done[seq] = (last_id, processed, changed)
+        advanced = False
+        while self._next_seq in self._done:
+            last_id, processed, changed = self._done.pop(self._next_seq)
+            self.last_id = last_id
+            self.processed += processed
+            self.changed += changed
+            self._next_seq += 1
+            advanced = True
+
+        if advanced and not self.dry_run:
+            await db.backfill_jobs.update_one(
+                {"_id": self.job},
+                {"$set": {
+                    "last_id": self.last_id,
+                    "processed": self.processed,
+                    "changed": self.changed,
+                    "updated_at": datetime.utcnow()
+                }}
+            )
+
+
+async def _analyze_chunk(posts: List[dict]):
+    texts = [post.get("content") or "" for post in posts]
+    for attempt in range(MAX_RETRIES):
+        try:
+            entities, model_version = await analyze_entities_batch(texts)
+            break
+        except Exception as e:
+            if attempt == MAX_RETRIES - 1:
+                raise
+            print(f"Backfill ML Error (retrying): {e}")
+            await asyncio.sleep(2 ** attempt)
+
+    for post, ents in zip(posts, entities):
+        await assign_canonical_ids(ents, post.get("context_data"))
+    risks = get_risk_scorer().score_batch(texts, entities)
+    return entities, risks, model_version
+
+
+async def run_backfill(job: str = "entities", chunk_size: int = 128, workers: int = 4,
+                       rate: float = 0, dry_run: bool = False, restart: bool = False,
+                       diff_limit: int = 50, skip_version: str = None,
+                       degraded_only: bool = False):
+    state = None if restart else await db.backfill_jobs.find_one({"_id": job})
+    if state and state.get("status") == "completed":
+        print(f"Backfill '{job}' already completed; use --restart to run it again")
+        return
+
+    checkpoint = _Checkpoint(job, state, dry_run)
+    if not dry_run:
+        await db.backfill_jobs.update_one(
+            {"_id": job},
+            {"$set": {
+                "status": "running",
+                "last_id": checkpoint.last_id,
+                "processed": checkpoint.processed,
+                "changed": checkpoint.changed,
+                "started_at": datetime.utcnow()
+            }},
+            upsert=True
+        )
+
+    queue = asyncio.Queue(maxsize=workers * 2)
+    limiter = RateLimiter(rate / chunk_size) if rate else None
+    diffs_shown = 0
+    resumed_from = checkpoint.processed
+    started = time.monotonic()
+
+    async def produce():
+        query = {"_id": {"$gt": checkpoint.last_id}} if checkpoint.last_id else {}
+        if skip_version:
+            query["model_version"] = {"$ne": skip_version}
+        if degraded_only:
+            query["analysis_degraded"] = True
+        cursor = db.posts.find(query, POST_FIELDS).sort("_id", 1).batch_size(chunk_size)
+        chunk, seq = [], 0
+        async for post in cursor:
+            chunk.append(post)
+            if len(chunk) == chunk_size:
+                await queue.put((seq, chunk))
+                chunk, seq = [], seq + 1
+        if chunk:
+            await queue.put((seq, chunk))
+        for _ in range(workers):
+            await queue.put(None)
+
+    async def work():
+        nonlocal diffs_shown
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            seq, posts = item
+            if limiter:
+                await limiter.wait()
+
+            entities, risks, model_version = await _analyze_chunk(posts)
+
+            updates = []
+            changed = 0
+            for post, ents, risk in zip(posts, entities, risks):
+                added, removed = entity_diff(post.get("entities", []), ents)
+                if not added and not removed and risk.score == post.get("risk_score"):
+                    if not dry_run and (
+                        post.get("model_version") != model_version or post.get("analysis_degraded")
+                    ):
+                        # Same result, but record which model produced it
+                        updates.append(UpdateOne(
+                            {"_id": post["_id"]},
+                            _post_update(post, {"model_version": model_version})
+                        ))
+                    continue
+                changed += 1
+                if not dry_run:
+                    updates.append(UpdateOne(
+                        {"_id": post["_id"]},
+                        _post_update(post, {"entities": ents, "risk_score": risk.score, "model_version": model_version})
+                    ))
+                elif diffs_shown < diff_limit:
+                    diffs_shown += 1
+                    changes = [f"+{key}" for key in added] + [f"-{key}" for key in removed]
+                    print(f"{post['_id']}  {' '.join(changes)}  risk {post.get('risk_score')} -> {risk.score}")
+
+            if updates:
+                await db.posts.bulk_write(updates, ordered=False)
+            await checkpoint.complete(seq, posts[-1]["_id"], len(posts), changed)
+
+    await asyncio.gather(produce(), *(work() for _ in range(workers)))
+
+    elapsed = time.monotonic() - started
+    print(
+        f"{'Would change' if dry_run else 'Changed'} {checkpoint.changed} of "
+        f"{checkpoint.processed} posts ({(checkpoint.processed - resumed_from) / max(elapsed, 1e-9):.0f} posts/s this run)"
+    )
+
+    if dry_run:
+        return
+
+    if checkpoint.changed:
+        await rebuild_catalog()
+        await rebuild_graph()
+        await feed_cache.invalidate()
+    await db.backfill_jobs.update_one(
+        {"_id": job},
+        {"$set": {"status": "completed", "finished_at": datetime.utcnow()}}
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-analyze stored posts with the current NER model")
+    parser.add_argument("--job", default="entities", help="checkpoint name (default: entities)")
+    parser.add_argument("--chunk-size", type=int, default=128, help="posts per ML batch call")
+    parser.add_argument("--workers", type=int, default=4, help="chunks analyzed concurrently")
+    parser.add_argument("--rate", type=float, default=0, help="max posts per second (0 = unlimited)")
+    parser.add_argument("--dry-run", action="store_true", help="print entity diffs, write nothing")
+    parser.add_argument("--diff-limit", type=int, default=50, help="diffs printed in --dry-run")
+    parser.add_argument("--restart", action="store_true", help="ignore the stored checkpoint")
+    parser.add_argument("--skip-version", help="skip posts already analyzed by this model version")
+    parser.add_argument("--degraded-only", action="store_true",
+                        help="only posts analyzed while the ML service was unavailable")
+    args = parser.parse_args()
+
+    asyncio.run(run_backfill(
+        job=args.job,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        rate=args.rate,
+        dry_run=args.dry_run,
+        restart=args.restart,
+        diff_limit=args.diff_limit,
+        skip_version=args.skip_version,
+        degraded_only=args.degraded_only
+    ))
@@ -0,0 +1,166 @@
+"""
+Entity Catalog
+
+An incrementally maintained summary of every entity mentioned in posts, so
+`/entities/` and `/entities/stats` read a few small documents instead of
+unwinding every post's `entities` array on each call.
+
+Collections:
+- entity_catalog:      one doc per (canonical_id, label) with the canonical
+                       name as `text`, mention_count and last_seen
+- entity_label_stats:  one doc per label with total_mentions, unique_count
+- counters:            {"_id": "posts_with_entities", "value": n}
+
+Post creation calls `record_post_entities`, post deletion calls
+`remove_post_entities`. `rebuild_catalog` recomputes everything from the
+posts collection (run `python -m app.services.entity_catalog` once to seed
+an existing database, after `python -m app.services.entity_resolution`).
+"""
+
+import asyncio
+from collections import Counter
+from datetime import datetime
+from pymongo import ReturnDocument
+
+from app.services.database import db
+from app.services.entity_resolution import canonical_id, display_name
+
+
+def _entity_id(ent: dict) -> str:
+    # Posts analyzed before canonicalization fall back to their own text
+    return ent.get("canonical_id") or canonical_id(display_name(ent["text"]))
+
+
+def _count_mentions(entities: list):
+    """Mention counts per (canonical_id, label), plus a display name per id."""
+    counts = Counter()
+    names = {}
+    for ent in entities:
+        if not ent.get("text"):
+            continue
+        cid = _entity_id(ent)
+        counts[(cid, ent["label"])] += 1
+        names.setdefault(cid, ent.get("canonical_name") or display_name(ent["text"]))
+    return counts, names
+
+
+async def ensure_indexes():
+    await db.entity_catalog.create_index([("mention_count", -1)])
+    await db.entity_catalog.create_index([("label", 1), ("mention_count", -1)])
+
+
+async def record_post_entities(entities: list, created_at: datetime):
+    """Add one post's entity mentions to the catalog."""
+    mentions, names = _count_mentions(entities)
+    if not mentions:
+        return
+
+    label_mentions = Counter()
+    label_new = Counter()
+
+    for (cid, label), count in mentions.items():
+        before = await db.entity_catalog.find_one_and_update(
+            {"_id": {"id": cid, "label": label}},
+            {
+                "$inc": {"mention_count": count},
+                "$max": {"last_seen": created_at},
+                "$setOnInsert": {"canonical_id": cid, "text": names[cid], "label": label}
+            },
+            upsert=True,
+            return_document=ReturnDocument.BEFORE
+        )
+        label_mentions[label] += count
+        if before is None:
+            label_new[label] += 1
+
+    for label, count in label_mentions.items():
+        await db.entity_label_stats.update_one(
+            {"_id": label},
+            {"$inc": {"total_mentions": count, "unique_count": label_new[label]}},
+            upsert=True
+        )
+
+    await db.counters.update_one(
+        {"_id": "posts_with_entities"},
+        {"$inc": {"value": 1}},
+        upsert=True
+    )
+
+
+async def remove_post_entities(entities: list):
+    """
+    Subtract a deleted post's entity mentions. Entities with no remaining
+    mentions are dropped. `last_seen` is not rolled back.
+    """
+    mentions, _ = _count_mentions(entities)
+    if not mentions:
+        return
+
+    label_mentions = Counter()
+    label_removed = Counter()
+
+    for (cid, label), count in mentions.items():
+        key = {"id": cid, "label": label}
+        after = await db.entity_catalog.find_one_and_update(
+            {"_id": key},
+            {"$inc": {"mention_count": -count}},
+            return_document=ReturnDocument.AFTER
+        )
+        if after is None:
+            continue
+
+        label_mentions[label] += count
+        if after["mention_count"] <= 0:
+            deleted = await db.entity_catalog.delete_one(
+                {"_id": key, "mention_count": {"$lte": 0}}
+            )
+            label_removed[label] += deleted.deleted_count
+
+    for label, count in label_mentions.items():
+        await db.entity_label_stats.update_one(
+            {"_id": label},
+            {"$inc": {"total_mentions": -count, "unique_count": -label_removed[label]}}
+        )
+
+    await db.counters.update_one(
+        {"_id": "posts_with_entities"},
+        {"$inc": {"value": -1}}
+    )
+
+
+async def rebuild_catalog():
+    """Recompute the catalog, label stats and counters from all posts."""
+    await db.posts.aggregate([
+        {"$unwind": "$entities"},
+        {"$group": {
+            "_id": {"id": "$entities.canonical_id", "label": "$entities.label"},
+            "canonical_id": {"$first": "$entities.canonical_id"},
+            "text": {"$first": "$entities.canonical_name"},
+            "label": {"$first": "$entities.label"},
+            "mention_count": {"$sum": 1},
+            "last_seen": {"$max": "$created_at"}
+        }},
+        {"$out": "entity_catalog"}
+    ], allowDiskUse=True).to_list(length=None)
+
+    await db.entity_catalog.aggregate([
+        {"$group": {
+            "_id": "$label",
+            "total_mentions": {"$sum": "$mention_count"},
+            "unique_count": {"$sum": 1}
+        }},
+        {"$out": "entity_label_stats"}
+    ]).to_list(length=None)
+
+    posts_with_entities = await db.posts.count_documents({"entities.0": {"$exists": True}})
+    await db.counters.update_one(
+        {"_id": "posts_with_entities"},
+        {"$set": {"value": posts_with_entities}},
+        upsert=True
+    )
+    await ensure_indexes()
+
+
+if __name__ == "__main__":
+    asyncio.run(rebuild_catalog())
+    print("Entity catalog rebuilt")
@@ -0,0 +1,29 @@
+"""
+Multilingual Entity Dictionary
+
+Known aliases (slang, Hinglish, native script) mapped to the entity's
+English name and label. Used by `ml_client.analyze_text` for dictionary
+matching and by `entity_resolution` to resolve aliases to canonical ids.
+"""
+
+KNOWN_ENTITIES = {
+    # Hinglish / Slang
+    "raga": ("Rahul Gandhi", "PER"),
+    "namo": ("Narendra Modi", "PER"),
+    "pappu": ("Rahul Gandhi", "PER"),
+    "kejri": ("Arvind Kejriwal", "PER"),
+    "yogi": ("Yogi Adityanath", "PER"),
+    
+    # Marathi / Hindi (Roots)
+    "शिवाजी": ("Chhatrapati Shivaji Maharaj", "PER"),
+    "पुणे": ("Pune", "LOC"),
+    "मुंबई": ("Mumbai", "LOC"),
+    "ठाकरे": ("Bal Thackeray", "PER"),
+    "फडणवीस": ("Devendra Fadnavis", "PER"),
+    "पवार": ("Sharad Pawar", "PER"),
+    "शिंदे": ("Eknath Shinde", "PER"),
+    "मोदी": ("Narendra Modi", "PER"),
+    "भारत": ("India", "GPE"),
+    "दिल्ली": ("Delhi", "LOC"),
+    "केजरीवाल": ("Arvind Kejriwal", "PER")
+}
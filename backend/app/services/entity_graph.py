@@ -0,0 +1,177 @@
+"""
+Entity Co-occurrence Graph
+
+Pair counts of entities mentioned in the same post, maintained on post
+creation/deletion, so the top-k neighbors of any entity are one indexed
+read (`entity_cooccurrence` sorted by `weight` for a given `a`). Nodes are
+canonical entity ids (see `entity_resolution`).
+
+Edges are stored in both directions. Recent co-occurrences count more:
+weights use forward exponential decay, i.e. each post adds
+exp((created_at - DECAY_EPOCH) / DECAY_TAU) instead of 1. Ordering by the
+stored weight therefore equals ordering by the decayed weight at any point
+in time, and nothing has to be rewritten as edges age; `decayed_score`
+converts a stored weight to its value now. With a 7-day half-life the
+stored weights stay within float range for about 13 years after the epoch.
+
+Run `python -m app.services.entity_graph` once to build the graph from
+existing posts.
+"""
+
+import asyncio
+import math
+from datetime import datetime
+from typing import List
+from pymongo import UpdateOne
+
+from app.services.database import db
+from app.services.entity_resolution import canonical_id, display_name
+
+DECAY_EPOCH = datetime(2024, 1, 1)
+HALF_LIFE_DAYS = 7
+DECAY_TAU = HALF_LIFE_DAYS * 86400 / math.log(2)
+
+# Caps the pairs written per post (n * (n - 1) edges)
+MAX_ENTITIES_PER_POST = 15
+
+
+def entity_key(ent: dict) -> str:
+    # Posts analyzed before canonicalization fall back to their own text
+    return ent.get("canonical_id") or canonical_id(display_name(ent["text"]))
+
+
+def _decay_factor(when: datetime) -> float:
+    return math.exp((when - DECAY_EPOCH).total_seconds() / DECAY_TAU)
+
+
+def decayed_score(weight: float, now: datetime = None) -> float:
+    return weight / _decay_factor(now or datetime.utcnow())
+
+
+def _post_nodes(entities: list) -> dict:
+    """Distinct entities of a post: canonical id -> (display name, label)."""
+    nodes = {}
+    for ent in entities:
+        if not ent.get("text"):
+            continue
+        name = ent.get("canonical_name") or display_name(ent["text"])
+        nodes.setdefault(entity_key(ent), (name, ent.get("label")))
+        if len(nodes) >= MAX_ENTITIES_PER_POST:
+            break
+    return nodes
+
+
+def _edge_updates(nodes: dict, weight: float, count: int) -> List[UpdateOne]:
+    updates = []
+    for a in nodes:
+        for b, (b_text, b_label) in nodes.items():
+            if a == b:
+                continue
+            updates.append(UpdateOne(
+                {"_id": {"a": a, "b": b}},
+                {
+                    "$inc": {"weight": weight, "count": count},
+                    "$set": {"a": a, "b": b, "b_text": b_text, "b_label": b_label}
+                },
+                upsert=count > 0
+            ))
+    return updates
+
+
+async def ensure_indexes():
+    await db.entity_cooccurrence.create_index([("a", 1), ("weight", -1)])
+
+
+async def record_post(entities: list, created_at: datetime):
+    nodes = _post_nodes(entities)
+    if len(nodes) < 2:
+        return
+    await db.entity_cooccurrence.bulk_write(
+        _edge_updates(nodes, _decay_factor(created_at), 1),
+        ordered=False
+    )
+
+
+async def remove_post(entities: list, created_at: datetime):
+    nodes = _post_nodes(entities)
+    if len(nodes) < 2:
+        return
+    await db.entity_cooccurrence.bulk_write(
+        _edge_updates(nodes, -_decay_factor(created_at), -1),
+        ordered=False
+    )
+    await db.entity_cooccurrence.delete_many({
+        "a": {"$in": list(nodes)},
+        "count": {"$lte": 0}
+    })
+
+
+async def top_neighbors(entity_id: str, limit: int = 10) -> List[dict]:
+    """Top co-occurring entities for a canonical id, strongest (recency-weighted) first."""
+    now = datetime.utcnow()
+    cursor = (
+        db.entity_cooccurrence
+        .find({"a": entity_id})
+        .sort("weight", -1)
+        .limit(limit)
+    )
+    return [
+        {
+            "key": edge["b"],
+            "text": edge["b_text"],
+            "label": edge["b_label"],
+            "co_occurrences": edge["count"],
+            "score": round(decayed_score(edge["weight"], now), 4)
+        }
+        async for edge in cursor
+    ]
+
+
+async def ego_graph(entity_id: str, text: str, limit: int = 10) -> dict:
+    """
+    The entity, its top neighbors, and the edges among those neighbors,
+    in a nodes/edges shape suitable for graph visualisation.
+    """
+    center = entity_id
+    neighbors = await top_neighbors(entity_id, limit)
+    now = datetime.utcnow()
+
+    nodes = [{"id": center, "text": text, "center": True}] + [
+        {"id": n["key"], "text": n["text"], "label": n["label"], "center": False}
+        for n in neighbors
+    ]
+    edges = [
+        {"source": center, "target": n["key"], "weight": n["score"], "count": n["co_occurrences"]}
+        for n in neighbors
+    ]
+
+    neighbor_keys = [n["key"] for n in neighbors]
+    if neighbor_keys:
+        cursor = db.entity_cooccurrence.find({
+            "a": {"$in": neighbor_keys},
+            "b": {"$in": neighbor_keys}
+        })
+        async for edge in cursor:
+            # Each undirected edge is stored twice; keep one direction
+            if edge["a"] < edge["b"]:
+                edges.append({
+                    "source": edge["a"],
+                    "target": edge["b"],
+                    "weight": round(decayed_score(edge["weight"], now), 4),
+                    "count": edge["count"]
+                })
+
+    return {"nodes": nodes, "edges": edges}
+
+
+async def rebuild_graph():
+    """Recompute the whole graph from the posts collection."""
+    await db.entity_cooccurrence.drop()
+    await ensure_indexes()
+    async for post in db.posts.find({"entities.1": {"$exists": True}}, {"entities": 1, "created_at": 1}):
+        await record_post(post["entities"], post["created_at"])
+
+
+if __name__ == "__main__":
+    asyncio.run(rebuild_graph())
+    print("Entity co-occurrence graph rebuilt")
@@ -0,0 +1,171 @@
+"""
+Entity Canonicalization
+
+Gives every entity a stable `canonical_id` at analysis time so "Modi",
+"मोदी", "#NaMo" and "Narendra Modi" count, page and search as one entity.
+
+Resolution order for an entity mention:
+1. `identified_as` (set by dictionary and hashtag matching)
+2. the Wikipedia title found for it during context generation
+3. the alias index (`entity_aliases`), learned from 1 and 2
+4. the known-entities dictionary
+5. the mention itself, normalized
+
+Ids are slugs of the canonical name ("Narendra Modi" -> "narendra_modi").
+Aliases are stored under a normalized key (case-folded, NFKC, without
+#/@, spaces or punctuation), so lookups are exact matches: no regex or
+case folding at query time.
+
+`python -m app.services.entity_resolution` assigns canonical ids to posts
+analyzed before this existed.
+"""
+
+import asyncio
+import re
+import unicodedata
+from typing import Optional, Tuple
+
+from app.services.cache import TTLCache
+from app.services.database import db
+from app.services.entity_dictionary import KNOWN_ENTITIES
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+# alias key -> (canonical_id, canonical_name); negative lookups cached as None
+_alias_cache = TTLCache(maxsize=20000, ttl=600)
+
+
+def alias_key(text: str) -> str:
+    """Normalized lookup key for any spelling of an entity."""
+    text = unicodedata.normalize("NFKC", text).casefold().lstrip("#@")
+    return _NON_WORD.sub("", text)
+
+
+def canonical_id(name: str) -> str:
+    """Stable id for a canonical entity name."""
+    name = unicodedata.normalize("NFKC", name).casefold().lstrip("#@")
+    return _NON_WORD.sub("_", name).strip("_")
+
+
+def display_name(text: str) -> str:
+    return text.lstrip("#@").strip()
+
+
+_DICTIONARY_ALIASES = {}
+for _alias, (_english_name, _label) in KNOWN_ENTITIES.items():
+    _DICTIONARY_ALIASES[alias_key(_alias)] = _english_name
+    _DICTIONARY_ALIASES[alias_key(_english_name)] = _english_name
+
+
+async def lookup_alias(text: str) -> Optional[Tuple[str, str]]:
+    """(canonical_id, canonical_name) for a known alias, or None."""
+    key = alias_key(text)
+    if not key:
+        return None
+
+    if key in _alias_cache:
+        return _alias_cache.get(key)
+
+    doc = await db.entity_aliases.find_one({"_id": key})
+    if doc:
+        result = (doc["canonical_id"], doc["canonical_name"])
+    elif key in _DICTIONARY_ALIASES:
+        name = _DICTIONARY_ALIASES[key]
+        result = (canonical_id(name), name)
+    else:
+        result = None
+
+    _alias_cache.set(key, result)
+    return result
+
+
+async def resolve_canonical_id(text: str) -> str:
+    """Canonical id for user-supplied entity text (entity pages, search, topics)."""
+    resolved = await lookup_alias(text)
+    return resolved[0] if resolved else canonical_id(display_name(text))
+
+
+async def _register_alias(text: str, cid: str, name: str, source: str):
+    key = alias_key(text)
+    if not key or _alias_cache.get(key) == (cid, name):
+        return
+    await db.entity_aliases.update_one(
+        {"_id": key},
+        {"$set": {"canonical_id": cid, "canonical_name": name, "source": source}},
+        upsert=True
+    )
+    _alias_cache.set(key, (cid, name))
+
+
+async def assign_canonical_ids(entities: list, context_data: dict = None):
+    """
+    Set `canonical_id` and `canonical_name` on each entity in place and
+    learn aliases from authoritative names (dictionary, Wikipedia).
+    """
+    wiki_titles = {
+        item["entity"]: item["identified_as"]
+        for item in (context_data or {}).get("disambiguation", [])
+        if item.get("identified_as")
+    }
+
+    for ent in entities:
+        text = ent.get("text", "")
+        name, source = None, None
+
+        if ent.get("identified_as"):
+            name, source = ent["identified_as"], ent.get("source", "identified_as")
+        elif text in wiki_titles:
+            name, source = wiki_titles[text], "wikipedia"
+
+        if name:
+            cid = canonical_id(name)
+            await _register_alias(text, cid, name, source)
+            await _register_alias(name, cid, name, source)
+        else:
+            resolved = await lookup_alias(text)
+            if resolved:
+                cid, name = resolved
+            else:
+                name = display_name(text)
+                cid = canonical_id(name)
+
+        ent["canonical_id"] = cid
+        ent["canonical_name"] = name
+
+
+async def backfill_post_canonical_ids(batch_size: int = 500):
+    """Assign canonical ids to stored posts whose entities lack them."""
+    from pymongo import UpdateOne
+
+    cursor = db.posts.find(
+        {"entities": {"$elemMatch": {"canonical_id": {"$exists": False}}}},
+        {"entities": 1, "context_data": 1}
+    )
+    updates = []
+    async for post in cursor:
+        entities = post.get("entities", [])
+        await assign_canonical_ids(entities, post.get("context_data"))
+        updates.append(UpdateOne({"_id": post["_id"]}, {"$set": {"entities": entities}}))
+        if len(updates) >= batch_size:
+            await db.posts.bulk_write(updates, ordered=False)
+            updates = []
+    if updates:
+        await db.posts.bulk_write(updates, ordered=False)
+
+
+async def ensure_indexes():
+    await db.posts.create_index([("entities.canonical_id", 1), ("created_at", -1)])
+
+
+if __name__ == "__main__":
+    from app.services.entity_catalog import rebuild_catalog
+    from app.services.entity_graph import rebuild_graph
+
+    async def _main():
+        await backfill_post_canonical_ids()
+        await ensure_indexes()
+        await rebuild_catalog()
+        await rebuild_graph()
+
+    asyncio.run(_main())
+    print("Canonical entity ids assigned; catalog and graph rebuilt")
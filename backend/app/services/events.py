@@ -0,0 +1,139 @@
+"""
+Real-Time Event Bus
+
+Pushes new-post, like-count and comment events to connected clients so they
+don't have to poll the feeds.
+
+Topics:
+- "global"             every new post, like and comment
+- "user:<user_id>"     new posts by one user (clients expand "following")
+- "entity:<id>"        new posts mentioning an entity (canonical id)
+- "post:<post_id>"     likes and comments on one post
+
+Each connection gets a bounded queue. When a client reads slower than
+events arrive, the oldest queued events are dropped and a single "resync"
+event tells the client to refetch instead of the server buffering without
+limit.
+
+Fan-out across uvicorn workers, selected by EVENTS_BACKEND:
+- "memory" (default): events reach clients connected to the same worker.
+- "redis": events are published on a Redis pub/sub channel at REDIS_URL
+  and every worker delivers them to its own clients.
+"""
+
+import asyncio
+import os
+from typing import Iterable, Set
+
+import orjson
+
+EVENTS_BACKEND = os.getenv("EVENTS_BACKEND", "memory")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+CHANNEL = "pulse:events"
+
+# Events buffered per connection before the oldest are dropped
+QUEUE_SIZE = 100
+
+
+class Subscription:
+    def __init__(self, topics: Set[str]):
+        self.topics = topics
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.lagged = False
+
+    def offer(self, message: dict):
+        if self.queue.full():
+            # Backpressure: drop the oldest event and ask the client to resync.
+            # The flag, not a queued marker, so further drops can't evict it
+            self.queue.get_nowait()
+            self.lagged = True
+        self.queue.put_nowait(message)
+
+    async def next_event(self, timeout: float) -> dict:
+        """
+        The next event to send: "resync" first if events were dropped since
+        the last one was taken. Raises asyncio.TimeoutError after `timeout`.
+        """
+        if self.lagged:
+            self.lagged = False
+            return {"type": "resync"}
+        return await asyncio.wait_for(self.queue.get(), timeout=timeout)
+
+
+_subscriptions: Set[Subscription] = set()
+_redis = None
+_listener_task = None
+
+
+def subscribe(topics: Iterable[str]) -> Subscription:
+    subscription = Subscription(set(topics))
+    _subscriptions.add(subscription)
+    return subscription
+
+
+def unsubscribe(subscription: Subscription):
+    _subscriptions.discard(subscription)
+
+
+def _deliver(topics: Iterable[str], event: dict):
+    topics = set(topics)
+    for subscription in list(_subscriptions):
+        matched = subscription.topics & topics
+        if matched:
+            subscription.offer({**event, "topic": next(iter(matched))})
+
+
+async def publish(topics: Iterable[str], event: dict):
+    """
+    Broadcast an event to every subscriber of any of `topics`.
+    Never raises; a failed publish only loses the push, not the write.
+    """
+    topics = list(topics)
+    if _redis is None:
+        _deliver(topics, event)
+        return
+
+    try:
+        message = orjson.dumps({"topics": topics, "event": event}, default=str)
+        await _redis.publish(CHANNEL, message)
+    except Exception as e:
+        print(f"Event publish error: {e}")
+        _deliver(topics, event)
+
+
+async def _listen():
+    pubsub = _redis.pubsub()
+    await pubsub.subscribe(CHANNEL)
+    while True:
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                payload = orjson.loads(message["data"])
+                _deliver(payload["topics"], payload["event"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Event listener error: {e}")
+            await asyncio.sleep(1)
+
+
+async def start():
+    """Connect the cross-worker fan-out (called on startup)."""
+    global _redis, _listener_task
+    if EVENTS_BACKEND != "redis" or _listener_task is not None:
+        return
+
+    # Optional dependency: only needed when this backend is selected
+    import redis.asyncio as redis
+    _redis = redis.from_url(REDIS_URL)
+    _listener_task = asyncio.create_task(_listen())
+
+
+def post_topics(post: dict) -> list:
+    """Topics a newly created post is published on."""
+    topics = ["global", f"user:{post['user_id']}"]
+    for ent in post.get("entities", []):
+        if ent.get("canonical_id"):
+            topics.append(f"entity:{ent['canonical_id']}")
+    return topics
@@ -0,0 +1,201 @@
+"""
+Global Feed Cache
+
+`/posts/` and `/feed/` show every user the same newest posts, so the window
+of the newest FEED_WINDOW_SIZE post cards is kept in a shared hot cache and
+updated on writes (write-through) instead of re-queried per request:
+
+- `add_post` on insert, `remove_post` on delete
+- `update_post` for counters shown on the card (likes)
+- `invalidate` for bulk changes (e.g. username propagation)
+
+Only viewer-specific fields are computed per request
+(see `app.services.post_enrichment`).
+
+Backends, selected by FEED_CACHE_BACKEND:
+- "memory" (default): per-worker window. Writes on another worker become
+  visible when the window is reloaded, at most FEED_CACHE_TTL seconds later.
+- "redis": shared window in Redis (or any Redis-compatible server) at
+  REDIS_URL, so every worker sees writes immediately.
+"""
+
+import os
+import time
+from typing import List, Optional
+
+import orjson
+
+from app.models.post import FEED_CARD_PROJECTION
+from app.services.database import db
+
+FEED_WINDOW_SIZE = 100
+FEED_CACHE_TTL = int(os.getenv("FEED_CACHE_TTL", 30))
+FEED_CACHE_BACKEND = os.getenv("FEED_CACHE_BACKEND", "memory")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+
+async def _load_window_from_db() -> List[dict]:
+    cursor = (
+        db.posts
+        .find({}, FEED_CARD_PROJECTION)
+        .sort("created_at", -1)
+        .limit(FEED_WINDOW_SIZE)
+    )
+    posts = []
+    async for post in cursor:
+        post["_id"] = str(post["_id"])
+        post["likes"] = post.get("likes", 0)
+        posts.append(post)
+    return posts
+
+
+def _to_card(post: dict) -> dict:
+    """Shape a freshly inserted post document like a projected feed card."""
+    card = {k: v for k, v in post.items() if k != "context_data"}
+    card["_id"] = str(post["_id"])
+    card["entities"] = [
+        {k: v for k, v in ent.items() if k != "confidence"}
+        for ent in post.get("entities", [])
+    ]
+    return card
+
+
+class InProcessFeedBackend:
+    def __init__(self):
+        self._posts: Optional[List[dict]] = None
+        self._loaded_at = 0.0
+
+    async def get_window(self) -> List[dict]:
+        if self._posts is None or time.monotonic() - self._loaded_at > FEED_CACHE_TTL:
+            self._posts = await _load_window_from_db()
+            self._loaded_at = time.monotonic()
+        return self._posts
+
+    async def add_post(self, card: dict):
+        if self._posts is None:
+            return
+        self._posts = [card] + self._posts[:FEED_WINDOW_SIZE - 1]
+
+    async def remove_post(self, post_id: str):
+        if self._posts is None:
+            return
+        if any(p["_id"] == post_id for p in self._posts):
+            # Reload so the window is refilled to full size
+            self._posts = None
+
+    async def update_post(self, post_id: str, fields: dict):
+        if self._posts is None:
+            return
+        self._posts = [
+            {**p, **fields} if p["_id"] == post_id else p
+            for p in self._posts
+        ]
+
+    async def invalidate(self):
+        self._posts = None
+
+
+class RedisFeedBackend:
+    """
+    Window stored as a list of ids (`feed:ids`, newest first) plus a hash of
+    card bodies (`feed:posts`). `feed:loaded` expires after FEED_CACHE_TTL to
+    force a periodic resync with Mongo.
+    """
+
+    IDS_KEY = "feed:ids"
+    POSTS_KEY = "feed:posts"
+    LOADED_KEY = "feed:loaded"
+
+    def __init__(self, url: str):
+        # Optional dependency: only needed when this backend is selected
+        import redis.asyncio as redis
+        self._redis = redis.from_url(url)
+
+    async def _reload(self) -> List[dict]:
+        posts = await _load_window_from_db()
+        pipe = self._redis.pipeline(transaction=True)
+        pipe.delete(self.IDS_KEY, self.POSTS_KEY)
+        if posts:
+            pipe.rpush(self.IDS_KEY, *[p["_id"] for p in posts])
+            pipe.hset(self.POSTS_KEY, mapping={
+                p["_id"]: orjson.dumps(p, default=str) for p in posts
+            })
+        pipe.set(self.LOADED_KEY, 1, ex=FEED_CACHE_TTL)
+        await pipe.execute()
+        return posts
+
+    async def get_window(self) -> List[dict]:
+        if not await self._redis.exists(self.LOADED_KEY):
+            return await self._reload()
+
+        ids = await self._redis.lrange(self.IDS_KEY, 0, FEED_WINDOW_SIZE - 1)
+        if not ids:
+            return []
+        bodies = await self._redis.hmget(self.POSTS_KEY, ids)
+        return [orjson.loads(body) for body in bodies if body]
+
+    async def add_post(self, card: dict):
+        pipe = self._redis.pipeline(transaction=True)
+        pipe.lpush(self.IDS_KEY, card["_id"])
+        pipe.hset(self.POSTS_KEY, card["_id"], orjson.dumps(card, default=str))
+        pipe.ltrim(self.IDS_KEY, 0, FEED_WINDOW_SIZE - 1)
+        await pipe.execute()
+
+    async def remove_post(self, post_id: str):
+        removed = await self._redis.lrem(self.IDS_KEY, 0, post_id)
+        if removed:
+            # Force a reload so the window is refilled to full size
+            await self._redis.delete(self.LOADED_KEY)
+        await self._redis.hdel(self.POSTS_KEY, post_id)
+
+    async def update_post(self, post_id: str, fields: dict):
+        body = await self._redis.hget(self.POSTS_KEY, post_id)
+        if body:
+            card = {**orjson.loads(body), **fields}
+            await self._redis.hset(self.POSTS_KEY, post_id, orjson.dumps(card, default=str))
+
+    async def invalidate(self):
+        await self._redis.delete(self.LOADED_KEY)
+
+
+if FEED_CACHE_BACKEND == "redis":
+    _backend = RedisFeedBackend(REDIS_URL)
+else:
+    _backend = InProcessFeedBackend()
+
+
+async def get_newest_posts(limit: int) -> List[dict]:
+    """
+    Newest `limit` post cards (limit <= FEED_WINDOW_SIZE).
+    Returns copies, so callers may add per-viewer fields.
+    """
+    try:
+        window = await _backend.get_window()
+    except Exception as e:
+        print(f"Feed cache error: {e}")
+        window = await _load_window_from_db()
+    return [dict(post) for post in window[:limit]]
+
+
+async def _safe(operation, *args):
+    # A cache failure must never fail the write that triggered it
+    try:
+        await operation(*args)
+    except Exception as e:
+        print(f"Feed cache error: {e}")
+
+
+async def add_post(post: dict):
+    await _safe(_backend.add_post, _to_card(post))
+
+
+async def remove_post(post_id: str):
+    await _safe(_backend.remove_post, post_id)
+
+
+async def update_post(post_id: str, fields: dict):
+    await _safe(_backend.update_post, post_id, fields)
+
+
+async def invalidate():
+    await _safe(_backend.invalidate)
@@ -0,0 +1,107 @@
+"""
+HTTP Response Cache
+
+Caches rendered JSON bodies of read-heavy endpoints and serves them with
+validators so clients and CDNs can reuse them:
+
+- ETag (hash of the body) and Last-Modified on every response
+- 304 Not Modified for matching If-None-Match / If-Modified-Since
+- Cache-Control chosen per route
+
+Cached bodies depend on scopes ("trending", "comments:<post_id>", ...).
+Each scope has a version that is part of the cache key; write paths call
+`invalidate(...)` with the scopes they affect, which bumps their versions so
+the next read rebuilds the body (old entries simply age out of the LRU).
+
+Scope versions, cached bodies and their Last-Modified times live in each
+worker process and are not shared. An invalidation takes effect at once
+in the worker that made the write; other workers keep serving their
+cached body (and answering 304 for it) until the entry expires after the
+route's `ttl`, so staleness across workers is bounded by that TTL (60s by
+default, 30s for post details).
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import Request, Response
+from typing import Awaitable, Callable, Iterable
+
+import orjson
+
+from app.services.cache import TTLCache
+
+_response_cache = TTLCache(maxsize=2000, ttl=60)
+
+# scope -> version, bumped on every write to that scope
+_scope_versions = {}
+
+
+def invalidate(*scopes: str):
+    """Make every cached response depending on any of `scopes` stale."""
+    for scope in scopes:
+        _scope_versions[scope] = _scope_versions.get(scope, 0) + 1
+
+
+def _not_modified(request: Request, etag: str, last_modified: datetime) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = {tag.strip() for tag in if_none_match.split(",")}
+        return etag in tags or "*" in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is not None:
+            since = since.astimezone(timezone.utc).replace(tzinfo=None)
+        return last_modified.replace(microsecond=0) <= since
+
+    return False
+
+
+async def cached_json_response(
+    request: Request,
+    key: str,
+    build: Callable[[], Awaitable[object]],
+    scopes: Iterable[str],
+    cache_control: str,
+    ttl: float = 60
+) -> Response:
+    """
+    Serve `build()`'s JSON payload through the response cache.
+
+    Args:
+        request: The incoming request (for conditional headers)
+        key: Cache key; must include everything the payload depends on
+        build: Coroutine function producing the payload on a cache miss
+        scopes: Invalidation scopes the payload depends on
+        cache_control: Cache-Control header value for this route
+        ttl: Max seconds a body is reused without an invalidation
+    """
+    versioned_key = (key, tuple(_scope_versions.get(scope, 0) for scope in scopes))
+
+    entry = _response_cache.get(versioned_key)
+    if entry is None:
+        payload = await build()
+        body = orjson.dumps(payload, default=str)
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        entry = (body, etag, datetime.utcnow())
+        _response_cache.set(versioned_key, entry, ttl=ttl)
+
+    body, etag, last_modified = entry
+    headers = {
+        "ETag": etag,
+        "Last-Modified": format_datetime(
+            last_modified.replace(microsecond=0, tzinfo=timezone.utc),
+            usegmt=True
+        ),
+        "Cache-Control": cache_control
+    }
+
+    if _not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=body, media_type="application/json", headers=headers)
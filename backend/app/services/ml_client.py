@@ -1,11 +1,30 @@
+import asyncio
 import os
 import httpx
 import urllib.parse
 import xml.etree.ElementTree as ET
-import re
-import unicodedata
+
+from app.services.cache import TTLCache
+from app.services.entity_dictionary import KNOWN_ENTITIES
+from app.services.entity_resolution import assign_canonical_ids
+from app.services.risk import get_risk_scorer
+from app.services.text_utils import (
+    HASHTAG,
+    Token,
+    TokenStream,
+    detect_script_language,
+    is_latin,
+    match_key,
+    scan,
+)
+from app.services.upstream import UpstreamUnavailable, get_upstream
 
 ML_URL = os.getenv("ML_SERVICE_URL")
+# Batch endpoint, by default next to the single-text one (".../analyze/batch")
+ML_BATCH_URL = os.getenv("ML_SERVICE_BATCH_URL") or (f"{ML_URL.rstrip('/')}/batch" if ML_URL else None)
+# Fused endpoint (".../analyze/v2"): when set, the ML service returns final
+# entities (thresholded, refined, dictionary, hashtags) and the merge below is skipped
+ML_V2_URL = os.getenv("ML_SERVICE_V2_URL")
 
 # Headers for Google News (browser-like)
 BROWSER_HEADERS = {
@@ -17,46 +36,39 @@ WIKI_HEADERS = {
     "User-Agent": "PulseApp/1.0 (https://github.com/RXO95/pulse-social-platform)"
 }
 
-# Script detection for Unicode ranges
-SCRIPT_LANG_MAP = {
-    (0x0900, 0x097F): "hi",   # Devanagari (Hindi/Marathi)
-    (0x0980, 0x09FF): "bn",   # Bengali
-    (0x0A80, 0x0AFF): "gu",   # Gujarati
-    (0x0B00, 0x0B7F): "or",   # Odia
-    (0x0B80, 0x0BFF): "ta",   # Tamil
-    (0x0C00, 0x0C7F): "te",   # Telugu
-    (0x0C80, 0x0CFF): "kn",   # Kannada
-    (0x0D00, 0x0D7F): "ml",   # Malayalam
-    (0x0A00, 0x0A7F): "pa",   # Gurmukhi (Punjabi)
-}
+_wiki = get_upstream("wikipedia")
+_news = get_upstream("google_news")
+_translate = get_upstream("google_translate")
+_ml = get_upstream("ml_service")
 
+# Texts analyzed without model entities because the ML service was
+# unavailable or failed (exposed at /metrics/analysis)
+analysis_stats = {"analyzed": 0, "degraded": 0}
 
-def is_latin(text: str) -> bool:
-    """Check if text is primarily Latin script."""
-    latin_count = sum(1 for c in text if unicodedata.category(c).startswith('L') and ord(c) < 0x0250)
-    letter_count = sum(1 for c in text if unicodedata.category(c).startswith('L'))
-    return letter_count > 0 and (latin_count / letter_count) > 0.5
+# Last good result per query, served while an upstream is unavailable
+_FALLBACK_TTL = 24 * 60 * 60
+_wiki_fallback = TTLCache(maxsize=5000, ttl=_FALLBACK_TTL)
+_news_fallback = TTLCache(maxsize=2000, ttl=_FALLBACK_TTL)
+_transliterate_fallback = TTLCache(maxsize=5000, ttl=_FALLBACK_TTL)
 
 
-def detect_script_language(text: str) -> str:
-    """Detect the source language from Unicode script ranges."""
-    for char in text:
-        cp = ord(char)
-        for (start, end), lang in SCRIPT_LANG_MAP.items():
-            if start <= cp <= end:
-                return lang
-    return "hi"  # Default fallback
+def _raise_for_upstream_error(resp: httpx.Response):
+    """Server errors and throttling count as upstream failures; 404s do not."""
+    if resp.status_code >= 500 or resp.status_code == 429:
+        resp.raise_for_status()
 
 
 async def transliterate_to_english(text: str) -> str:
     """Translate non-Latin entity names to English using Google Translate."""
     if is_latin(text):
         return text
-    try:
+
+    async def fetch():
         src_lang = detect_script_language(text)
         url = f"https://translate.googleapis.com/translate_a/single?client=gtx&sl={src_lang}&tl=en&dt=t&q={urllib.parse.quote(text)}"
-        async with httpx.AsyncClient(timeout=4, headers=BROWSER_HEADERS) as client:
+        async with httpx.AsyncClient(timeout=_translate.timeout, headers=BROWSER_HEADERS) as client:
             resp = await client.get(url, follow_redirects=True)
+            _raise_for_upstream_error(resp)
             if resp.status_code == 200:
                 data = resp.json()
                 if data and data[0]:
@@ -66,154 +78,322 @@ async def transliterate_to_english(text: str) -> str:
                     words = translated.split()
                     cleaned = " ".join(w for w in words if w.lower() not in filler)
                     return cleaned if cleaned else translated
+        return text
+
+    try:
+        result = await _translate.call(fetch)
+        _transliterate_fallback.set(text, result)
+        return result
+    except UpstreamUnavailable:
+        pass
     except Exception as e:
         print(f"Transliterate Error: {e}")
-    return text
-
-VIOLENT_KEYWORDS = [
-    "kill", "murder", "shoot", "rape",
-    "die", "death", "attack", "bomb",
-    "hang", "stab",
-    "maar", "hatya", "khoon", "marne", "hamla"
-]
-
-SENSITIVE_LABELS = {"PER", "ORG", "GPE", "LOC"}
+    return _transliterate_fallback.get(text, text)
+
+
+
+# --- HASHTAG MATCHING ---
+# Dictionary aliases and English names by match key; the first entry wins
+_DICTIONARY_BY_KEY = {}
+for _alias, (_english_name, _label) in KNOWN_ENTITIES.items():
+    _DICTIONARY_BY_KEY.setdefault(match_key(_alias), (_english_name, _label))
+    _DICTIONARY_BY_KEY.setdefault(match_key(_english_name), (_english_name, _label))
+
+# Dictionary aliases by their words, e.g. ("raga",) -> ("Rahul Gandhi", "PER")
+_DICTIONARY_BY_WORDS = {}
+for _alias, (_english_name, _label) in KNOWN_ENTITIES.items():
+    _DICTIONARY_BY_WORDS.setdefault(scan(_alias).words, (_english_name, _label))
+_MAX_ALIAS_WORDS = max(len(words) for words in _DICTIONARY_BY_WORDS)
+
+# Native-script roots also match inflected words ("मुंबईत", "मोदींनी");
+# Latin aliases only match whole words, so "raga" is not found in "paragraph"
+_NATIVE_ROOTS = sorted(
+    (words[0] for words in _DICTIONARY_BY_WORDS if len(words) == 1 and not words[0].isascii()),
+    key=len,
+    reverse=True
+)
+
+
+def _native_root(word: str):
+    """The longest native-script root `word` starts with, if any."""
+    if word.isascii():
+        return None
+    for root in _NATIVE_ROOTS:
+        if word.startswith(root):
+            return root
+    return None
 
 
-# --- HASHTAG & MENTION EXTRACTION ---
-def normalize_hashtag(hashtag: str) -> str:
-    """
-    Convert hashtag to readable text.
-    #GameOfThrones -> Game Of Thrones
-    #game_of_thrones -> game of thrones
-    #gameofthrones -> gameofthrones (will match fuzzy later)
-    """
-    # Remove the # symbol
-    tag = hashtag.lstrip('#')
-    
-    # Handle underscores
-    if '_' in tag:
-        return tag.replace('_', ' ')
-    
-    # Handle camelCase: insert space before uppercase letters
-    result = re.sub(r'([a-z])([A-Z])', r'\1 \2', tag)
-    
-    # Handle consecutive uppercase followed by lowercase (e.g., XMLParser -> XML Parser)
-    result = re.sub(r'([A-Z]+)([A-Z][a-z])', r'\1 \2', result)
-    
-    return result
+def _dictionary_entities(text: str, stream: TokenStream) -> list:
+    """Dictionary aliases among the words of `text`, first mention of each entity."""
+    words = stream.words
+    entities = []
+    detected = set()
+    for i in range(len(words)):
+        start = stream.spans[i][0]
+        # Longest alias starting at this word
+        for n in range(min(_MAX_ALIAS_WORDS, len(words) - i), 0, -1):
+            known = _DICTIONARY_BY_WORDS.get(words[i:i + n])
+            if known:
+                end = stream.spans[i + n - 1][1]
+                break
+        else:
+            # Or a native-script root with a suffix, matched up to the root
+            root = _native_root(words[i])
+            if not root:
+                continue
+            known = _DICTIONARY_BY_WORDS[(root,)]
+            end = start + len(root)
+
+        english_name, label = known
+        if english_name not in detected:
+            entities.append({
+                # Original matched text (case/script preserved), not the English name
+                "text": text[start:end],
+                "label": label,
+                "confidence": 1.0,
+                "source": "dictionary",
+                "identified_as": english_name  # English name for disambiguation
+            })
+            detected.add(english_name)
+    return entities
 
 
-def extract_hashtags_and_mentions(text: str):
-    """Extract hashtags and @mentions from text."""
-    hashtags = re.findall(r'#(\w+)', text)
-    mentions = re.findall(r'@(\w+)', text)
-    return hashtags, mentions
+def _strip_fillers(key: str) -> str:
+    return key.replace('the', '').replace('of', '')
 
 
-def find_matching_entity(normalized_tag: str, entities: list, known_entities: dict):
+def find_matching_entity(token: Token, entities: list):
     """
-    Try to match a normalized hashtag with existing entities.
+    Try to match a hashtag with the dictionary or existing entities.
     Returns (matched_text, label, identified_as) or None.
     """
-    tag_lower = normalized_tag.lower().replace(' ', '')
-    
     # Check against KNOWN_ENTITIES dictionary
-    for key, (english_name, label) in known_entities.items():
-        key_normalized = key.lower().replace(' ', '')
-        english_normalized = english_name.lower().replace(' ', '')
-        
-        if tag_lower == key_normalized or tag_lower == english_normalized:
-            return (normalized_tag, label, english_name)
-    
+    known = _DICTIONARY_BY_KEY.get(token.key)
+    if known:
+        english_name, label = known
+        return (token.normalized, label, english_name)
+
     # Check against ML-detected entities (fuzzy match)
-    for ent in entities:
-        ent_text_normalized = ent["text"].lower().replace(' ', '')
-        if tag_lower == ent_text_normalized:
+    entity_keys = [(match_key(ent["text"]), ent) for ent in entities]
+    for key, ent in entity_keys:
+        if token.key == key:
             return (ent["text"], ent["label"], ent.get("identified_as"))
-    
+
     # Check by removing common suffixes/variations
     # e.g., "gameofthrones" should match "Game of Thrones"
-    for ent in entities:
-        ent_clean = ent["text"].lower().replace(' ', '').replace('the', '').replace('of', '')
-        tag_clean = tag_lower.replace('the', '').replace('of', '')
-        if tag_clean == ent_clean and len(tag_clean) > 3:
-            return (ent["text"], ent["label"], ent.get("identified_as"))
-    
+    tag_clean = _strip_fillers(token.key)
+    if len(tag_clean) > 3:
+        for key, ent in entity_keys:
+            if tag_clean == _strip_fillers(key):
+                return (ent["text"], ent["label"], ent.get("identified_as"))
+
     return None
 
-# --- MULTILINGUAL DICTIONARY ---
-KNOWN_ENTITIES = {
-    # Hinglish / Slang
-    "raga": ("Rahul Gandhi", "PER"),
-    "namo": ("Narendra Modi", "PER"),
-    "pappu": ("Rahul Gandhi", "PER"),
-    "kejri": ("Arvind Kejriwal", "PER"),
-    "yogi": ("Yogi Adityanath", "PER"),
-    
-    # Marathi / Hindi (Roots)
-    "शिवाजी": ("Chhatrapati Shivaji Maharaj", "PER"),
-    "पुणे": ("Pune", "LOC"),
-    "मुंबई": ("Mumbai", "LOC"),
-    "ठाकरे": ("Bal Thackeray", "PER"),
-    "फडणवीस": ("Devendra Fadnavis", "PER"),
-    "पवार": ("Sharad Pawar", "PER"),
-    "शिंदे": ("Eknath Shinde", "PER"),
-    "मोदी": ("Narendra Modi", "PER"),
-    "भारत": ("India", "GPE"),
-    "दिल्ली": ("Delhi", "LOC"),
-    "केजरीवाल": ("Arvind Kejriwal", "PER")
-}
+# MediaWiki Action API; point at scripts/mock_wikipedia.py for local testing
+WIKI_API_URL = os.getenv("WIKI_API_URL", "https://en.wikipedia.org/w/api.php")
+
+# Titles per query (intro extracts are served for at most 20 pages at once)
+WIKI_BATCH_SIZE = 20
+
+# Summary (or None for no article) per looked-up title
+_wiki_cache = TTLCache(maxsize=5000, ttl=60 * 60)
+
+
+def _resolve_title(title: str, renamed: dict) -> str:
+    # Follow normalization ("narendra modi" -> "Narendra modi"), then redirects
+    for _ in range(3):
+        if title not in renamed:
+            break
+        title = renamed[title]
+    return title
+
+
+async def _query_wikipedia(titles: list) -> dict:
+    """One MediaWiki query for up to WIKI_BATCH_SIZE titles: title -> summary or None."""
+    params = {
+        "action": "query",
+        "format": "json",
+        "formatversion": "2",
+        "redirects": "1",
+        "prop": "extracts|description",
+        "exintro": "1",
+        "explaintext": "1",
+        "exlimit": "max",
+        "titles": "|".join(titles)
+    }
+    async with httpx.AsyncClient(timeout=_wiki.timeout, headers=WIKI_HEADERS) as client:
+        resp = await client.get(WIKI_API_URL, params=params)
+        resp.raise_for_status()
+        data = resp.json().get("query", {})
+
+    renamed = {
+        item["from"]: item["to"]
+        for item in data.get("normalized", []) + data.get("redirects", [])
+    }
+    pages = {
+        page["title"]: page
+        for page in data.get("pages", [])
+        if not page.get("missing") and not page.get("invalid")
+    }
+
+    results = {}
+    for title in titles:
+        page = pages.get(_resolve_title(title, renamed))
+        if page and page.get("extract"):
+            results[title] = {
+                "title": page["title"],
+                "description": page.get("description", "Wikipedia Entry"),
+                "extract": page["extract"][:150] + "..."
+            }
+        else:
+            results[title] = None
+    return results
+
+
+async def fetch_wikipedia_summaries(queries, fallback: bool = True) -> dict:
+    """
+    Wikipedia summaries for many titles at once: query -> summary or None.
+    Uncached titles are resolved WIKI_BATCH_SIZE per upstream request.
+
+    When Wikipedia cannot answer, the last summary seen (or None) is
+    returned; with fallback=False, UpstreamUnavailable is raised instead,
+    so "unavailable" can be told apart from "no such article".
+    """
+    results = {}
+    missing = []
+    for query in dict.fromkeys(queries):
+        if query in _wiki_cache:
+            results[query] = _wiki_cache.get(query)
+        elif not query or "|" in query:
+            # "|" separates titles and never appears in one
+            results[query] = None
+        else:
+            missing.append(query)
+
+    async def lookup(batch):
+        try:
+            found = await _wiki.call(lambda: _query_wikipedia(batch))
+        except UpstreamUnavailable:
+            if not fallback:
+                raise
+            return {query: _wiki_fallback.get(query) for query in batch}
+        except Exception as e:
+            print(f"Wiki Fetch Error: {e}")
+            if not fallback:
+                raise UpstreamUnavailable(f"wikipedia: {e}") from e
+            return {query: _wiki_fallback.get(query) for query in batch}
+
+        for query, summary in found.items():
+            _wiki_cache.set(query, summary)
+            _wiki_fallback.set(query, summary)
+        return found
+
+    batches = [missing[i:i + WIKI_BATCH_SIZE] for i in range(0, len(missing), WIKI_BATCH_SIZE)]
+    for found in await asyncio.gather(*(lookup(batch) for batch in batches)):
+        results.update(found)
+    return results
+
 
 async def fetch_wikipedia_summary(query: str):
     """Fetches summary from Wikipedia with proper headers."""
-    try:
-        url = f"https://en.wikipedia.org/api/rest_v1/page/summary/{urllib.parse.quote(query)}"
-        async with httpx.AsyncClient(timeout=4, headers=WIKI_HEADERS) as client:
-            resp = await client.get(url, follow_redirects=True)
-            if resp.status_code == 200:
-                data = resp.json()
-                if "title" in data and "extract" in data:
-                    return {
-                        "title": data["title"],
-                        "description": data.get("description", "Wikipedia Entry"),
-                        "extract": data["extract"][:150] + "..."
-                    }
-    except Exception as e:
-        print(f"Wiki Fetch Error: {e}")
+    return (await fetch_wikipedia_summaries([query]))[query]
+
+
+# Stop reading a news feed after this many items or bytes
+NEWS_MAX_ITEMS = 10
+NEWS_MAX_BYTES = 256 * 1024
+
+# Parsed feed items per query: (items, complete), shared by every lookup
+# of the same query (e.g. the news query and its single-entity retry)
+_news_cache = TTLCache(maxsize=1000, ttl=10 * 60)
+
+
+def _mentions_any(title: str, entity_names) -> bool:
+    title_lower = title.lower()
+    return any(name.lower() in title_lower for name in entity_names)
+
+
+def _pick_headline(items, entity_names=None):
+    # If entity names provided, try to find relevant article first
+    if entity_names:
+        for title, link in items:
+            if title and link and _mentions_any(title, entity_names):
+                return {"headline": title, "url": link}
+
+    # Fallback: return first valid item
+    for title, link in items:
+        if title and link:
+            return {"headline": title, "url": link}
     return None
 
 
-async def fetch_google_news(query: str, entity_names=None):
+async def _stream_news_items(query: str, entity_names=None):
+    """
+    Parse RSS items while the response streams in. Stops reading as soon as
+    an item mentions one of `entity_names`, after NEWS_MAX_ITEMS items or
+    NEWS_MAX_BYTES bytes. Returns (items, complete); `complete` is False when
+    reading stopped before the first NEWS_MAX_ITEMS items were seen.
+    """
+    rss_url = f"https://news.google.com/rss/search?q={urllib.parse.quote(query)}&hl=en-IN&gl=IN&ceid=IN:en"
+    items = []
+    parser = ET.XMLPullParser(events=("end",))
+
+    async with httpx.AsyncClient(timeout=_news.timeout, headers=BROWSER_HEADERS) as client:
+        async with client.stream("GET", rss_url) as resp:
+            _raise_for_upstream_error(resp)
+            if resp.status_code != 200:
+                return [], True
+
+            received = 0
+            async for chunk in resp.aiter_bytes():
+                received += len(chunk)
+                parser.feed(chunk)
+                for _, elem in parser.read_events():
+                    if elem.tag != "item":
+                        continue
+                    title, link = elem.findtext("title"), elem.findtext("link")
+                    elem.clear()
+                    items.append((title, link))
+                    if len(items) >= NEWS_MAX_ITEMS:
+                        return items, True
+                    if entity_names and title and _mentions_any(title, entity_names):
+                        return items, False
+                if received >= NEWS_MAX_BYTES:
+                    return items, False
+
+    return items, True
+
+
+async def fetch_google_news(query: str, entity_names=None, fallback: bool = True):
     """Fetches News from Google RSS with proper headers. 
-    Optionally filters by entity_names for relevance."""
+    Optionally filters by entity_names for relevance.
+    With fallback=False, raises UpstreamUnavailable when the feed cannot be
+    read instead of using the last items seen."""
+    cached = _news_cache.get(query)
+    if cached is not None:
+        items, complete = cached
+        # A partial feed only answers lookups it already has a match for
+        if complete or not entity_names or any(
+            title and _mentions_any(title, entity_names) for title, _ in items
+        ):
+            return _pick_headline(items, entity_names)
+
     try:
-        rss_url = f"https://news.google.com/rss/search?q={urllib.parse.quote(query)}&hl=en-IN&gl=IN&ceid=IN:en"
-        async with httpx.AsyncClient(timeout=4, headers=BROWSER_HEADERS) as client:
-            resp = await client.get(rss_url)
-            if resp.status_code == 200:
-                root = ET.fromstring(resp.content)
-                items = root.findall(".//item")[:10]  # Check more items for relevance
-                
-                # If entity names provided, try to find relevant article first
-                if entity_names:
-                    for item in items:
-                        title = item.find("title").text
-                        link = item.find("link").text
-                        if title and link:
-                            title_lower = title.lower()
-                            if any(name.lower() in title_lower for name in entity_names):
-                                return {"headline": title, "url": link}
-                
-                # Fallback: return first valid item
-                for item in items:
-                    title = item.find("title").text
-                    link = item.find("link").text
-                    if title and link:
-                        return {"headline": title, "url": link}
+        items, complete = await _news.call(lambda: _stream_news_items(query, entity_names))
+        _news_cache.set(query, (items, complete))
+        _news_fallback.set(query, items)
+    except UpstreamUnavailable:
+        if not fallback:
+            raise
+        items = _news_fallback.get(query, [])
     except Exception as e:
         print(f"News Fetch Error: {e}")
-    return None
+        if not fallback:
+            raise UpstreamUnavailable(f"google_news: {e}") from e
+        items = _news_fallback.get(query, [])
+
+    return _pick_headline(items, entity_names)
 
 
 async def generate_context(entities, text=""):
@@ -227,30 +407,39 @@ async def generate_context(entities, text=""):
         return context
 
     # 1. Generate disambiguation for ALL entities
-    processed_entities = []
-    for ent in entities:
-        entity_text = ent["text"]
-        
+    async def english_name_for(ent):
         # Get English name for search
         if ent.get("identified_as"):
-            english_name = ent["identified_as"]
-        else:
-            english_name = await transliterate_to_english(entity_text)
-        
-        processed_entities.append({
-            "original": entity_text,
+            return ent["identified_as"]
+        return await transliterate_to_english(ent["text"])
+
+    english_names = await asyncio.gather(*(english_name_for(ent) for ent in entities))
+    processed_entities = [
+        {
+            "original": ent["text"],
             "english": english_name,
             "label": ent.get("label", "MISC")
-        })
-        
-        # Try to fetch Wikipedia data for this entity
-        wiki_data = await fetch_wikipedia_summary(english_name)
-        if not wiki_data and english_name != entity_text:
-            wiki_data = await fetch_wikipedia_summary(entity_text)
+        }
+        for ent, english_name in zip(entities, english_names)
+    ]
+
+    # Look up every entity in one request; retry misses by their original text
+    wiki = await fetch_wikipedia_summaries(e["english"] for e in processed_entities)
+    retry = [
+        e["original"] for e in processed_entities
+        if not wiki.get(e["english"]) and e["english"] != e["original"]
+    ]
+    if retry:
+        wiki.update(await fetch_wikipedia_summaries(retry))
+
+    for e in processed_entities:
+        wiki_data = wiki.get(e["english"])
+        if not wiki_data and e["english"] != e["original"]:
+            wiki_data = wiki.get(e["original"])
         
         if wiki_data:
             context["disambiguation"].append({
-                "entity": entity_text,
+                "entity": e["original"],
                 "identified_as": wiki_data["title"],
                 "description": wiki_data["description"]
             })
@@ -308,69 +497,144 @@ async def generate_context(entities, text=""):
     return context
 
 
-async def analyze_text(text: str):
+async def _analyze_v2(text: str):
+    async def call_ml():
+        async with httpx.AsyncClient(timeout=_ml.timeout) as client:
+            response = await client.post(ML_V2_URL, json={"texts": [text]})
+            response.raise_for_status()
+            return response.json()
+
+    data = await _ml.call(call_ml)
+    return data["results"][0]["entities"], data.get("model_version")
+
+
+async def analyze_text(text: str, with_context: bool = True):
+    """
+    Entities, risk and Pulse Context for one text. When the ML service is
+    unavailable (circuit open, rate limited) or fails, the result has only
+    dictionary, hashtag and mention entities and `analysis_degraded` is
+    True, so the caller can mark it for the entity backfill.
+    """
     ner_result = {"entities": []}
+    final_entities = None
+    degraded = False
 
     # 1. ML Service Call
-    if ML_URL:
+    if ML_V2_URL:
         try:
-            async with httpx.AsyncClient(timeout=3) as client:
-                response = await client.post(ML_URL, json={"text": text})
-                response.raise_for_status()
-                ner_result = response.json()
-        except:
-            pass
-
-    ml_entities = ner_result.get("entities", [])
-    
-    # 2. Dictionary Logic (The "Fix")
-    text_lower = text.lower()
-    dict_entities = []
-    detected_keys = set()
-
-    # Scan for dictionary keywords using Phrase Matching
-    for key, (english_name, label) in KNOWN_ENTITIES.items():
-        if key in text_lower:
-            # Prevent duplicate detections of the same concept
-            if english_name not in detected_keys:
-                # Find the actual matched text in the original (preserve case/script)
-                start_pos = text_lower.find(key)
-                actual_text = text[start_pos:start_pos + len(key)]
-                
-                dict_entities.append({
-                    "text": actual_text,  # Use original matched text, not English name
-                    "label": label,
-                    "confidence": 1.0,    # Mark as High Confidence
-                    "source": "dictionary",
-                    "identified_as": english_name  # Store English name for disambiguation
-                })
-                detected_keys.add(english_name)
-
-    # 3. Extract and process hashtags & mentions
-    hashtags, mentions = extract_hashtags_and_mentions(text)
+            final_entities, model_version = await _analyze_v2(text)
+            ner_result["model_version"] = model_version
+        except UpstreamUnavailable as e:
+            print(f"ML Service Unavailable: {e}")
+            degraded = True
+        except Exception as e:
+            print(f"ML Service Error: {e}")
+            degraded = True
+    elif ML_URL:
+        try:
+            async def call_ml():
+                async with httpx.AsyncClient(timeout=_ml.timeout) as client:
+                    response = await client.post(ML_URL, json={"text": text})
+                    response.raise_for_status()
+                    return response.json()
+
+            ner_result = await _ml.call(call_ml)
+        except UpstreamUnavailable as e:
+            # Degraded: dictionary and hashtag entities only
+            print(f"ML Service Unavailable: {e}")
+            degraded = True
+        except Exception as e:
+            print(f"ML Service Error: {e}")
+            degraded = True
+
+    analysis_stats["analyzed"] += 1
+    if degraded:
+        analysis_stats["degraded"] += 1
+
+    # Model entities arrive already filtered by per-label confidence
+    # thresholds and keep their `confidence`, like dictionary and hashtag
+    # entities do: a few bytes more per stored entity, but fewer spurious
+    # entities (and context lookups) per post. Feed cards project it out.
+    if final_entities is None:
+        final_entities = merge_entities(text, ner_result.get("entities", []))
+
+    # 5. Risk Logic
+    risk = get_risk_scorer().score(text, final_entities)
+
+    # 6. Generate Context (skipped for comments, which don't display it)
+    context_data = await generate_context(final_entities, text) if with_context else None
+
+    # 7. Canonical entity ids (uses Wikipedia titles from the context)
+    await assign_canonical_ids(final_entities, context_data)
+
+    return {
+        "entities": final_entities,
+        "risk_score": risk.score,
+        "violent_detected": risk.violent,
+        "contains_sensitive_entity": risk.contains_sensitive,
+        "context_data": context_data,
+        "model_version": ner_result.get("model_version"),
+        "analysis_degraded": degraded
+    }
+
+
+async def analyze_entities_batch(texts: list):
+    """
+    Final entity lists for many texts, plus the NER model version: one ML
+    batch call, then the same dictionary/hashtag merge as `analyze_text`
+    (done by the ML service itself with ML_SERVICE_V2_URL). Canonical ids
+    are not assigned. Raises on ML service errors (the caller decides
+    whether to retry or skip).
+    """
+    # Bulk jobs bypass the live-traffic circuit breaker and rate limit
+    async with httpx.AsyncClient(timeout=_ml.timeout * 10) as client:
+        response = await client.post(ML_V2_URL or ML_BATCH_URL, json={"texts": texts})
+        response.raise_for_status()
+        data = response.json()
+
+    if ML_V2_URL:
+        return [result["entities"] for result in data["results"]], data.get("model_version")
+
+    entities = [
+        merge_entities(text, result.get("entities", []))
+        for text, result in zip(texts, data["results"])
+    ]
+    return entities, data.get("model_version")
+
+
+def merge_entities(text: str, ml_entities: list) -> list:
+    """Merge ML entities with dictionary, hashtag and mention entities."""
+    # One token stream (cached per text) for the dictionary, tags and risk scorer
+    stream = scan(text)
+
+    # 2. Dictionary Logic: whole-word alias matches
+    dict_entities = _dictionary_entities(text, stream)
+
+    # 3. Process hashtags & mentions
+    tokens = stream.tags
     hashtag_mention_entities = []
     
     # Combined entities so far for matching
     all_entities_so_far = dict_entities + ml_entities
-    detected_normalized = {ent["text"].lower().replace(' ', '') for ent in all_entities_so_far}
+    detected_normalized = {match_key(ent["text"]) for ent in all_entities_so_far}
     
     # Process hashtags
-    for tag in hashtags:
-        normalized = normalize_hashtag(tag)
-        normalized_key = normalized.lower().replace(' ', '')
+    for token in tokens:
+        if token.kind != HASHTAG:
+            continue
         
         # Skip if already detected
-        if normalized_key in detected_normalized:
+        if token.key in detected_normalized:
             continue
         
         # Try to find a matching entity
-        match = find_matching_entity(normalized, all_entities_so_far, KNOWN_ENTITIES)
+        match = find_matching_entity(token, all_entities_so_far)
         
         if match:
             matched_text, label, identified_as = match
             # Use the hashtag as display but link to the matched entity
             hashtag_mention_entities.append({
-                "text": f"#{tag}",
+                "text": f"#{token.text}",
                 "label": label,
                 "confidence": 0.9,
                 "source": "hashtag",
@@ -380,53 +644,31 @@ async def analyze_text(text: str):
             # New entity from hashtag - default to ORG/MISC based on common patterns
             # Proper nouns are often ORG (brands, shows, etc.)
             hashtag_mention_entities.append({
-                "text": f"#{tag}",
+                "text": f"#{token.text}",
                 "label": "ORG",  # Default: hashtags often refer to brands/shows/events
                 "confidence": 0.7,
                 "source": "hashtag",
-                "identified_as": normalized.title() if normalized != tag else None
+                "identified_as": token.normalized.title() if token.normalized != token.text else None
             })
         
-        detected_normalized.add(normalized_key)
+        detected_normalized.add(token.key)
     
     # Process @mentions as PER entities
-    for mention in mentions:
-        mention_lower = mention.lower()
+    for token in tokens:
+        if token.kind == HASHTAG:
+            continue
         
         # Skip if already detected as an entity
-        if mention_lower in detected_normalized:
+        if token.key in detected_normalized:
             continue
         
         hashtag_mention_entities.append({
-            "text": f"@{mention}",
+            "text": f"@{token.text}",
             "label": "PER",
             "confidence": 0.9,
             "source": "mention"
         })
-        detected_normalized.add(mention_lower)
+        detected_normalized.add(token.key)
 
     # 4. Merge: Dictionary first, then hashtags/mentions, then ML entities
-    final_entities = dict_entities + hashtag_mention_entities + ml_entities
-
-    # 5. Risk Logic
-    violent = any(word in text_lower for word in VIOLENT_KEYWORDS)
-    contains_sensitive = any(ent.get("label") in SENSITIVE_LABELS for ent in final_entities)
-
-    risk_score = 0.0
-    if violent and contains_sensitive:
-        risk_score = 0.95
-    elif violent:
-        risk_score = 0.7
-    elif contains_sensitive:
-        risk_score = 0.4
-
-    # 6. Generate Context
-    context_data = await generate_context(final_entities, text)
-
-    return {
-        "entities": final_entities,
-        "risk_score": risk_score,
-        "violent_detected": violent,
-        "contains_sensitive_entity": contains_sensitive,
-        "context_data": context_data
-    }
\ No newline at end of file
+    return dict_entities + hashtag_mention_entities + ml_entities
\ No newline at end of file
@@ -0,0 +1,74 @@
+"""
+Post Enrichment
+
+Adds author and viewer-specific fields to a list of post cards with one
+batched query per field instead of several queries per post:
+
+- profile_pic_url (author)
+- comment_count
+- is_liked_by_user / is_bookmarked / is_followed_by_user (viewer)
+"""
+
+from bson import ObjectId
+from typing import List
+
+from app.services.database import db
+
+
+async def enrich_posts_for_viewer(posts: List[dict], user_id: str) -> List[dict]:
+    if not posts:
+        return posts
+
+    post_ids = [post["_id"] for post in posts]
+    author_ids = list({post["user_id"] for post in posts})
+
+    authors = {}
+    async for author in db.users.find(
+        {"_id": {"$in": [ObjectId(a) for a in author_ids if ObjectId.is_valid(a)]}},
+        {"profile_pic_url": 1}
+    ):
+        authors[str(author["_id"])] = author.get("profile_pic_url")
+
+    comment_counts = {}
+    async for row in db.comments.aggregate([
+        {"$match": {"post_id": {"$in": post_ids}}},
+        {"$group": {"_id": "$post_id", "count": {"$sum": 1}}}
+    ]):
+        comment_counts[row["_id"]] = row["count"]
+
+    liked = {
+        like["post_id"]
+        async for like in db.likes.find(
+            {"user_id": user_id, "post_id": {"$in": post_ids}},
+            {"post_id": 1}
+        )
+    }
+
+    bookmarked = {
+        bookmark["post_id"]
+        async for bookmark in db.bookmarks.find(
+            {"user_id": user_id, "post_id": {"$in": post_ids}},
+            {"post_id": 1}
+        )
+    }
+
+    followed = {
+        follow["following_id"]
+        async for follow in db.follows.find(
+            {"follower_id": user_id, "following_id": {"$in": author_ids}},
+            {"following_id": 1}
+        )
+    }
+
+    for post in posts:
+        post_id = post["_id"]
+        post["likes"] = post.get("likes", 0)
+        post["profile_pic_url"] = authors.get(post["user_id"])
+        post["comment_count"] = comment_counts.get(post_id, 0)
+        post["is_liked_by_user"] = post_id in liked
+        post["is_bookmarked"] = post_id in bookmarked
+        post["is_followed_by_user"] = (
+            post["user_id"] != user_id and post["user_id"] in followed
+        )
+
+    return posts
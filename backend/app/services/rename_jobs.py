@@ -0,0 +1,224 @@
+"""
+Username Propagation Jobs
+
+Posts and comments store a denormalized copy of the author's username.
+When a user renames themselves, the new name is copied onto their posts
+and comments in the background, in bounded batches, so the profile update
+request returns immediately.
+
+Each rename is tracked as a document in `rename_jobs`. The job records the
+last processed `_id` per collection, so an interrupted job (worker restart,
+deploy) can be resumed from where it stopped instead of starting over.
+
+A job is run by one worker at a time: the worker claims it by writing its
+`owner` and a `lease_until`, renews the lease at every checkpoint, and
+stops if it no longer holds it. Startup (in every worker) only resumes
+jobs whose lease is missing or expired.
+"""
+
+import asyncio
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from bson import ObjectId
+
+from app.services.database import db
+from app.services import feed_cache
+from app.services.http_cache import invalidate
+
+BATCH_SIZE = 500
+
+# Collections holding a denormalized `username` keyed by `user_id`
+PROPAGATED_COLLECTIONS = ("posts", "comments")
+
+# A claimed job is left alone by other workers until its lease expires
+LEASE_SECONDS = 300
+
+# Identifies this worker process as a job owner
+OWNER = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+_resume_task = None
+
+
+def _lease_until() -> datetime:
+    return datetime.utcnow() + timedelta(seconds=LEASE_SECONDS)
+
+
+def _unleased(now: datetime) -> dict:
+    """Query for jobs nobody holds (`None` also matches a missing field)."""
+    return {"$or": [{"lease_until": None}, {"lease_until": {"$lt": now}}]}
+
+
+async def start_rename_job(user_id: str, username: str) -> str:
+    """
+    Create a propagation job for a rename and supersede any job still
+    running for the same user (its target username is now stale).
+
+    Returns:
+        The id of the new job
+    """
+    await db.rename_jobs.update_many(
+        {"user_id": user_id, "status": {"$in": ["pending", "running"]}},
+        {"$set": {"status": "superseded", "finished_at": datetime.utcnow()}}
+    )
+
+    job = {
+        "user_id": user_id,
+        "username": username,
+        "status": "pending",
+        "progress": {
+            name: {"last_id": None, "updated": 0, "done": False}
+            for name in PROPAGATED_COLLECTIONS
+        },
+        "owner": None,
+        "lease_until": None,
+        "created_at": datetime.utcnow(),
+        "finished_at": None
+    }
+    result = await db.rename_jobs.insert_one(job)
+    return str(result.inserted_id)
+
+
+async def _propagate_collection(job: dict, name: str) -> bool:
+    """
+    Rewrite `username` on one collection in `_id` order, checkpointing after
+    every batch. Returns False if the job was superseded or its lease lost
+    mid-way.
+    """
+    job_id = job["_id"]
+    progress = job["progress"][name]
+    collection = db[name]
+
+    last_id = progress["last_id"]
+    updated = progress["updated"]
+
+    while True:
+        query = {"user_id": job["user_id"]}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+
+        batch = [
+            doc
+            async for doc in collection.find(query, {"_id": 1, "post_id": 1}).sort("_id", 1).limit(BATCH_SIZE)
+        ]
+        if not batch:
+            break
+        batch_ids = [doc["_id"] for doc in batch]
+
+        result = await collection.update_many(
+            {"_id": {"$in": batch_ids}},
+            {"$set": {"username": job["username"]}}
+        )
+        last_id = batch_ids[-1]
+        updated += result.modified_count
+
+        # Cached post details and comment lists still show the old username
+        if name == "comments":
+            post_ids = {doc["post_id"] for doc in batch if doc.get("post_id")}
+            invalidate(*(f"comments:{post_id}" for post_id in post_ids))
+        else:
+            invalidate(*(f"post:{doc['_id']}" for doc in batch))
+
+        # Checkpoint and renew the lease; stop if a newer rename superseded
+        # this job or another worker took it over
+        checkpoint = await db.rename_jobs.update_one(
+            {"_id": job_id, "status": "running", "owner": OWNER},
+            {"$set": {
+                f"progress.{name}.last_id": last_id,
+                f"progress.{name}.updated": updated,
+                "lease_until": _lease_until()
+            }}
+        )
+        if checkpoint.matched_count == 0:
+            return False
+
+        # Yield between batches so other requests on this worker keep flowing
+        await asyncio.sleep(0)
+
+    done = await db.rename_jobs.update_one(
+        {"_id": job_id, "status": "running", "owner": OWNER},
+        {"$set": {f"progress.{name}.done": True}}
+    )
+    return done.matched_count == 1
+
+
+async def run_rename_job(job_id: str):
+    """
+    Run (or resume) a propagation job until every collection is done.
+    Safe to call on a partially processed job; does nothing if another
+    worker holds the job's lease.
+    """
+    job = await db.rename_jobs.find_one_and_update(
+        {
+            "_id": ObjectId(job_id),
+            "status": {"$in": ["pending", "running"]},
+            **_unleased(datetime.utcnow())
+        },
+        {"$set": {"status": "running", "owner": OWNER, "lease_until": _lease_until()}},
+        return_document=True
+    )
+    if not job:
+        return
+
+    try:
+        for name in PROPAGATED_COLLECTIONS:
+            if job["progress"][name]["done"]:
+                continue
+            if not await _propagate_collection(job, name):
+                return
+
+        await db.rename_jobs.update_one(
+            {"_id": job["_id"], "status": "running", "owner": OWNER},
+            {"$set": {"status": "completed", "lease_until": None, "finished_at": datetime.utcnow()}}
+        )
+        # Cached feed cards still carry the old username
+        await feed_cache.invalidate()
+    except Exception as e:
+        # Leave the job as "running" with its checkpoint, and release the
+        # lease so it is resumed later
+        print(f"Rename job {job_id} interrupted: {e}")
+        await db.rename_jobs.update_one(
+            {"_id": job["_id"], "owner": OWNER},
+            {"$set": {"lease_until": None}}
+        )
+
+
+async def resume_rename_jobs():
+    """Resume every unfinished propagation job no worker holds."""
+    cursor = db.rename_jobs.find(
+        {"status": {"$in": ["pending", "running"]}, **_unleased(datetime.utcnow())},
+        {"_id": 1}
+    )
+    async for job in cursor:
+        await run_rename_job(str(job["_id"]))
+
+
+def start():
+    """Resume interrupted jobs in the background (called on startup)."""
+    global _resume_task
+    if _resume_task is None:
+        # Keep a reference so the task isn't garbage-collected mid-run
+        _resume_task = asyncio.create_task(resume_rename_jobs())
+
+
+async def get_latest_rename_job(user_id: str):
+    """Return the most recent propagation job for a user, or None."""
+    job = await db.rename_jobs.find_one(
+        {"user_id": user_id},
+        sort=[("created_at", -1)]
+    )
+    if not job:
+        return None
+
+    return {
+        "job_id": str(job["_id"]),
+        "username": job["username"],
+        "status": job["status"],
+        "updated": {
+            name: job["progress"][name]["updated"]
+            for name in PROPAGATED_COLLECTIONS
+        },
+        "created_at": job["created_at"],
+        "finished_at": job.get("finished_at")
+    }
@@ -0,0 +1,199 @@
+"""
+Risk Scoring
+
+One component scores posts and comments, one text or a batch at a time,
+reusing the entities already extracted for them. The scorer is selected
+by RISK_SCORER:
+
+- "rules" (default): violent keywords and sensitive entity labels
+    violent + sensitive entity -> 0.95, violent -> 0.7, sensitive -> 0.4
+  A text is violent when a word starts with a keyword ("attacked"), but
+  not when one only appears inside a word ("skill", "change").
+- "linear": a logistic model over hashed word 1-2 grams and entity-label
+  features, loaded from RISK_MODEL_PATH (an .npz with `weights` and
+  `bias`) and scored with NumPy. Falls back to "rules" when the model
+  cannot be loaded. NumPy is only needed for this scorer.
+
+Both read a text's words from `text_utils.scan`, the token stream the
+entity merge already built for it.
+
+Content scoring above BLOCK_THRESHOLD is rejected.
+
+`python -m app.services.risk` benchmarks scorer throughput.
+"""
+
+import os
+import zlib
+from typing import List, NamedTuple, Sequence
+
+from app.services.text_utils import scan
+
+RISK_SCORER = os.getenv("RISK_SCORER", "rules")
+RISK_MODEL_PATH = os.getenv("RISK_MODEL_PATH", "risk_model.npz")
+
+BLOCK_THRESHOLD = 0.6
+
+VIOLENT_KEYWORDS = [
+    "kill", "murder", "shoot", "rape",
+    "die", "death", "attack", "bomb",
+    "hang", "stab",
+    "maar", "hatya", "khoon", "marne", "hamla"
+]
+
+SENSITIVE_LABELS = {"PER", "ORG", "GPE", "LOC"}
+
+_VIOLENT_PREFIXES = tuple(VIOLENT_KEYWORDS)
+
+
+class RiskResult(NamedTuple):
+    score: float
+    violent: bool
+    contains_sensitive: bool
+
+
+def _signals(text: str, entities: list):
+    violent = any(word.startswith(_VIOLENT_PREFIXES) for word in scan(text).words)
+    contains_sensitive = any(ent.get("label") in SENSITIVE_LABELS for ent in entities)
+    return violent, contains_sensitive
+
+
+class RuleRiskScorer:
+    name = "rules"
+
+    def score_batch(self, texts: Sequence[str], entities: Sequence[list]) -> List[RiskResult]:
+        results = []
+        for text, ents in zip(texts, entities):
+            violent, contains_sensitive = _signals(text, ents)
+            if violent and contains_sensitive:
+                score = 0.95
+            elif violent:
+                score = 0.7
+            elif contains_sensitive:
+                score = 0.4
+            else:
+                score = 0.0
+            results.append(RiskResult(score, violent, contains_sensitive))
+        return results
+
+    def score(self, text: str, entities: list) -> RiskResult:
+        return self.score_batch([text], [entities])[0]
+
+
+def feature_buckets(text: str, entities: list, n_features: int) -> List[int]:
+    """Hashed feature indices: word unigrams, bigrams and entity labels."""
+    words = scan(text).words
+    features = list(words) + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    features += [f"label={ent.get('label')}" for ent in entities]
+    # crc32 is stable across processes, unlike hash()
+    return [zlib.crc32(f.encode("utf-8")) % n_features for f in features]
+
+
+class LinearRiskScorer:
+    name = "linear"
+
+    def __init__(self, weights, bias: float):
+        import numpy as np
+
+        self._np = np
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.bias = float(bias)
+
+    @classmethod
+    def load(cls, path: str) -> "LinearRiskScorer":
+        import numpy as np
+
+        with np.load(path) as model:
+            return cls(model["weights"], float(model["bias"]))
+
+    def score_batch(self, texts: Sequence[str], entities: Sequence[list]) -> List[RiskResult]:
+        np = self._np
+        if not texts:
+            return []
+
+        # Flatten every text's feature indices, then sum each text's slice
+        buckets = [feature_buckets(t, e, len(self.weights)) for t, e in zip(texts, entities)]
+        lengths = np.fromiter((len(b) for b in buckets), dtype=np.int64, count=len(buckets))
+        flat = np.fromiter((i for b in buckets for i in b), dtype=np.int64, count=int(lengths.sum()))
+
+        owner = np.repeat(np.arange(len(texts)), lengths)
+        logits = np.bincount(owner, weights=self.weights[flat], minlength=len(texts)) + self.bias
+        scores = 1.0 / (1.0 + np.exp(-logits))
+
+        results = []
+        for text, ents, score in zip(texts, entities, scores):
+            violent, contains_sensitive = _signals(text, ents)
+            results.append(RiskResult(round(float(score), 4), violent, contains_sensitive))
+        return results
+
+    def score(self, text: str, entities: list) -> RiskResult:
+        return self.score_batch([text], [entities])[0]
+
+
+def train_linear_model(texts: Sequence[str], entities: Sequence[list], labels: Sequence[int],
+                       n_features: int = 2 ** 18, epochs: int = 50, lr: float = 0.5):
+    """
+    Fit (weights, bias) by full-batch logistic regression on hashed
+    features. Save with numpy.savez(RISK_MODEL_PATH, weights=..., bias=...).
+    """
+    import numpy as np
+
+    buckets = [feature_buckets(t, e, n_features) for t, e in zip(texts, entities)]
+    lengths = np.array([len(b) for b in buckets], dtype=np.int64)
+    flat = np.array([i for b in buckets for i in b], dtype=np.int64)
+    owner = np.repeat(np.arange(len(texts)), lengths)
+    y = np.asarray(labels, dtype=np.float64)
+
+    weights = np.zeros(n_features)
+    bias = 0.0
+    for _ in range(epochs):
+        logits = np.bincount(owner, weights=weights[flat], minlength=len(texts)) + bias
+        error = 1.0 / (1.0 + np.exp(-logits)) - y
+        weights -= lr * np.bincount(flat, weights=error[owner], minlength=n_features) / len(texts)
+        bias -= lr * error.mean()
+    return weights.astype(np.float32), bias
+
+
+_scorer = None
+
+
+def get_risk_scorer():
+    global _scorer
+    if _scorer is None:
+        _scorer = RuleRiskScorer()
+        if RISK_SCORER == "linear":
+            try:
+                _scorer = LinearRiskScorer.load(RISK_MODEL_PATH)
+            except Exception as e:
+                print(f"Risk Model Load Error: {e}")
+    return _scorer
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    random.seed(7)
+    vocab = ("the match was great today mumbai rains traffic election results speech "
+             "attack bomb khoon maar modi bjp congress delhi cricket movie release").split()
+    labels = ["PER", "ORG", "GPE", "LOC", "MISC"]
+    # Fits the scan cache, like texts whose entities were just merged
+    texts = [" ".join(random.choices(vocab, k=random.randint(5, 40))) for _ in range(4000)]
+    entities = [[{"label": random.choice(labels)} for _ in range(random.randint(0, 4))] for _ in texts]
+
+    scorers = [RuleRiskScorer()]
+    try:
+        import numpy as np
+        scorers.append(LinearRiskScorer(np.random.default_rng(7).normal(0, 0.1, 2 ** 18), 0.0))
+    except ImportError:
+        print("numpy not installed; skipping the linear scorer")
+
+    for scorer in scorers:
+        for batch_size in (1, 64, 1024):
+            for streams in ("cold", "cached"):
+                if streams == "cold":
+                    scan.cache_clear()
+                start = time.perf_counter()
+                for i in range(0, len(texts), batch_size):
+                    scorer.score_batch(texts[i:i + batch_size], entities[i:i + batch_size])
+                elapsed = time.perf_counter() - start
+                print(f"{scorer.name:<7} batch={batch_size:<5} {streams:<7} {len(texts) / elapsed:>10,.0f} texts/s")
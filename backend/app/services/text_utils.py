@@ -0,0 +1,222 @@
+"""
+Text Utilities
+
+Script detection and hashtag/mention tokenization for entity names and
+post text.
+
+`script_profile` classifies every letter of a string in one pass: a
+precomputed translate table maps each codepoint up to Malayalam to a
+one-character script code (non-letters are dropped), and the codes are
+tallied with Counter. Both steps run in C, so there is no per-character
+`unicodedata.category` call or range scan in Python.
+
+`scan` splits a text into words, hashtags and mentions in one precompiled
+regex pass and caches the result per text, so the dictionary matcher, the
+hashtag/mention merge and the risk scorer share one token stream. `tokenize`
+returns just its hashtags and mentions, each with its offsets, readable
+form and matching key.
+
+`python -m app.services.text_utils` benchmarks both over a synthetic
+corpus of mixed-script posts.
+"""
+
+import re
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+from types import MappingProxyType
+from typing import List, Mapping, NamedTuple, Tuple
+
+# Unicode blocks of the Indian scripts we transliterate from
+SCRIPT_RANGES = [
+    (0x0900, 0x097F, "devanagari"),
+    (0x0980, 0x09FF, "bengali"),
+    (0x0A00, 0x0A7F, "gurmukhi"),
+    (0x0A80, 0x0AFF, "gujarati"),
+    (0x0B00, 0x0B7F, "odia"),
+    (0x0B80, 0x0BFF, "tamil"),
+    (0x0C00, 0x0C7F, "telugu"),
+    (0x0C80, 0x0CFF, "kannada"),
+    (0x0D00, 0x0D7F, "malayalam"),
+]
+
+# Source language for Google Translate per script
+SCRIPT_LANGUAGE = {
+    "devanagari": "hi",   # Hindi/Marathi
+    "bengali": "bn",
+    "gurmukhi": "pa",     # Punjabi
+    "gujarati": "gu",
+    "odia": "or",
+    "tamil": "ta",
+    "telugu": "te",
+    "kannada": "kn",
+    "malayalam": "ml",
+}
+
+LATIN = "latin"
+OTHER = "other"
+
+# Letters below this codepoint are Latin (Basic Latin through Latin Extended-B)
+_LATIN_END = 0x0250
+_TABLE_END = SCRIPT_RANGES[-1][1] + 1
+
+
+def _build_table():
+    scripts = [LATIN, OTHER] + [name for _, _, name in SCRIPT_RANGES]
+    code_for = {name: chr(0xE000 + i) for i, name in enumerate(scripts)}  # private-use chars
+
+    table = {}
+    for cp in range(_TABLE_END):
+        if not unicodedata.category(chr(cp)).startswith("L"):
+            table[cp] = None
+            continue
+        script = LATIN if cp < _LATIN_END else OTHER
+        for start, end, name in SCRIPT_RANGES:
+            if start <= cp <= end:
+                script = name
+                break
+        table[cp] = code_for[script]
+
+    # Real private-use characters in the input must not pass as script codes
+    for code in code_for.values():
+        table[ord(code)] = None
+
+    return table, {code: name for name, code in code_for.items()}
+
+
+_SCRIPT_TABLE, _CODE_SCRIPT = _build_table()
+
+
+@lru_cache(maxsize=8192)
+def script_profile(text: str) -> Mapping[str, float]:
+    """
+    Share of the letters in `text` written in each script, e.g.
+    {"latin": 0.5, "devanagari": 0.5}. Empty when `text` has no letters.
+    """
+    counts = Counter()
+    for code, n in Counter(text.translate(_SCRIPT_TABLE)).items():
+        script = _CODE_SCRIPT.get(code)
+        if script is not None:
+            counts[script] += n
+        elif code.isalpha():
+            # Letters beyond the table (CJK, Arabic, ...)
+            counts[OTHER] += n
+
+    total = sum(counts.values())
+    return MappingProxyType({script: n / total for script, n in counts.items()} if total else {})
+
+
+def is_latin(text: str) -> bool:
+    """Check if text is primarily Latin script."""
+    return script_profile(text).get(LATIN, 0) > 0.5
+
+
+def dominant_indic_script(text: str):
+    """The Indian script with the most letters in `text`, or None."""
+    profile = script_profile(text)
+    indic = [(ratio, script) for script, ratio in profile.items() if script in SCRIPT_LANGUAGE]
+    return max(indic)[1] if indic else None
+
+
+def detect_script_language(text: str) -> str:
+    """Detect the source language from Unicode script ranges."""
+    script = dominant_indic_script(text)
+    return SCRIPT_LANGUAGE[script] if script else "hi"  # Default fallback
+
+
+# --- WORD, HASHTAG & MENTION TOKENIZATION ---
+# Words include the combining vowel signs of Indian scripts, which \w alone
+# splits on ("शिवाजी" is one word, not three)
+_TOKEN_RE = re.compile(r"([#@]?)((?:\w|[\u0900-\u0D7F])+)")
+_CAMEL_RE = re.compile(r"([a-z])([A-Z])")
+_ACRONYM_RE = re.compile(r"([A-Z]+)([A-Z][a-z])")
+
+HASHTAG = "hashtag"
+MENTION = "mention"
+
+
+class Token(NamedTuple):
+    kind: str          # HASHTAG or MENTION
+    text: str          # without the leading # or @
+    start: int         # offset of the # or @ in the source text
+    end: int
+    normalized: str    # readable form, e.g. "Game Of Thrones"
+    key: str           # match_key(normalized), e.g. "gameofthrones"
+
+
+class TokenStream(NamedTuple):
+    words: Tuple[str, ...]              # every word, lowercased, tag bodies included
+    spans: Tuple[Tuple[int, int], ...]  # (start, end) of each word in the text
+    tags: Tuple[Token, ...]             # hashtags and mentions
+
+
+def match_key(text: str) -> str:
+    """Case- and space-insensitive key used to compare tags with entity names."""
+    return text.lower().replace(" ", "")
+
+
+def normalize_hashtag(hashtag: str) -> str:
+    """
+    Convert hashtag to readable text.
+    #GameOfThrones -> Game Of Thrones
+    #game_of_thrones -> game of thrones
+    #gameofthrones -> gameofthrones (will match fuzzy later)
+    """
+    tag = hashtag.lstrip("#")
+
+    if "_" in tag:
+        return tag.replace("_", " ")
+
+    # camelCase, then acronyms followed by a word (XMLParser -> XML Parser)
+    return _ACRONYM_RE.sub(r"\1 \2", _CAMEL_RE.sub(r"\1 \2", tag))
+
+
+@lru_cache(maxsize=4096)
+def scan(text: str) -> TokenStream:
+    """Words, hashtags and @mentions of `text` in order of appearance."""
+    words, spans, tags = [], [], []
+    for match in _TOKEN_RE.finditer(text):
+        sigil, body = match.groups()
+        words.append(body.lower())
+        spans.append(match.span(2))
+        if sigil == "#":
+            normalized = normalize_hashtag(body)
+            tags.append(Token(HASHTAG, body, match.start(), match.end(), normalized, match_key(normalized)))
+        elif sigil == "@":
+            tags.append(Token(MENTION, body, match.start(), match.end(), body, body.lower()))
+    return TokenStream(tuple(words), tuple(spans), tuple(tags))
+
+
+def tokenize(text: str) -> List[Token]:
+    """Hashtags and @mentions of `text` in order of appearance."""
+    return list(scan(text).tags)
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    # Synthetic posts shaped like real ones: Hinglish, native script, tags
+    random.seed(7)
+    phrases = [
+        "Mumbai mein aaj bahut baarish hui", "मुंबई में आज भारी बारिश",
+        "Election results out tomorrow", "ಬೆಂಗಳೂರು traffic is insane today",
+        "Great speech by the PM", "দারুণ খেলা হলো আজ", "Watching the match with friends",
+    ]
+    tags = ["#MumbaiRains", "#GameOfThrones", "#IPL2024", "#election_results", "#NaMo", "#XMLParser"]
+    mentions = ["@narendramodi", "@RahulGandhi", "@BCCI", "@pulse_app"]
+    corpus = [
+        " ".join(random.sample(phrases, 2) + random.sample(tags, random.randint(0, 3))
+                 + random.sample(mentions, random.randint(0, 2)))
+        for _ in range(5000)
+    ]
+
+    def timed(label, fn):
+        start = time.perf_counter()
+        for post in corpus:
+            fn(post)
+        elapsed = time.perf_counter() - start
+        print(f"{label:<22} {len(corpus) / elapsed:>10,.0f} posts/s")
+
+    timed("scan", scan.__wrapped__)
+    timed("script_profile", script_profile.__wrapped__)
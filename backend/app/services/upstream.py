@@ -0,0 +1,203 @@
+"""
+Upstream Guards
+
+Wraps calls to external services (Wikipedia, Google News, Google
+Translate, the ML service) so a slow or failing upstream degrades to a
+fallback instead of holding every request for its full timeout.
+
+Each upstream has:
+- a token bucket: at most `rate` calls per second (bursts up to `burst`);
+  calls over the limit are rejected immediately
+- a circuit breaker: after `failure_threshold` consecutive failures or
+  calls slower than `slow_call_seconds`, the circuit opens and calls are
+  rejected for `reset_timeout` seconds; then a single probe call is let
+  through (half-open) and its outcome closes or re-opens the circuit
+- a hard timeout per call
+
+Rejected calls raise `UpstreamUnavailable`; callers fall back to cached or
+empty results. Counters and breaker state are exposed at /metrics/upstreams.
+
+Settings per upstream come from UPSTREAM_<NAME>_<SETTING> environment
+variables, e.g. UPSTREAM_WIKIPEDIA_RATE=20.
+"""
+
+import asyncio
+import os
+import time
+from typing import Awaitable, Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class UpstreamUnavailable(Exception):
+    """The call was not attempted: circuit open or rate limit exceeded."""
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self._updated = time.monotonic()
+
+    def try_acquire(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class RateLimiter:
+    """
+    Spaces calls at least 1 / rate seconds apart by waiting, for background
+    jobs that should queue rather than be rejected.
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+
+    def allow(self) -> bool:
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = HALF_OPEN
+            self._probe_in_flight = False
+
+        if self.state == HALF_OPEN:
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+        return True
+
+    def cancel_probe(self):
+        """The half-open probe was not sent; let the next call probe instead."""
+        self._probe_in_flight = False
+
+    def record_success(self):
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+
+class Upstream:
+    def __init__(self, name: str, rate: float, burst: int, timeout: float,
+                 slow_call_seconds: float, failure_threshold: int = 5,
+                 reset_timeout: float = 30):
+        prefix = f"UPSTREAM_{name.upper()}_"
+        self.name = name
+        self.timeout = float(os.getenv(prefix + "TIMEOUT", timeout))
+        self.slow_call_seconds = float(os.getenv(prefix + "SLOW_CALL_SECONDS", slow_call_seconds))
+        self.bucket = TokenBucket(
+            float(os.getenv(prefix + "RATE", rate)),
+            int(os.getenv(prefix + "BURST", burst))
+        )
+        self.breaker = CircuitBreaker(
+            int(os.getenv(prefix + "FAILURE_THRESHOLD", failure_threshold)),
+            float(os.getenv(prefix + "RESET_TIMEOUT", reset_timeout))
+        )
+        self.stats = {
+            "calls": 0,
+            "successes": 0,
+            "failures": 0,
+            "slow_calls": 0,
+            "rejected_open": 0,
+            "rejected_rate": 0,
+            "last_latency_ms": None
+        }
+
+    async def call(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run `fn()` under the breaker, rate limit and timeout.
+        Raises UpstreamUnavailable when the call is not attempted, and
+        re-raises the call's own error (or TimeoutError) when it fails.
+        """
+        if not self.breaker.allow():
+            self.stats["rejected_open"] += 1
+            raise UpstreamUnavailable(f"{self.name}: circuit open")
+        if not self.bucket.try_acquire():
+            self.stats["rejected_rate"] += 1
+            self.breaker.cancel_probe()
+            raise UpstreamUnavailable(f"{self.name}: rate limited")
+
+        self.stats["calls"] += 1
+        started = time.monotonic()
+        try:
+            result = await asyncio.wait_for(fn(), timeout=self.timeout)
+        except Exception:
+            self.stats["failures"] += 1
+            self.breaker.record_failure()
+            raise
+        except BaseException:
+            # Cancelled (shutdown, client gone): no verdict on the upstream,
+            # but a half-open probe must not stay in flight forever
+            self.breaker.cancel_probe()
+            raise
+        finally:
+            self.stats["last_latency_ms"] = round((time.monotonic() - started) * 1000, 1)
+
+        if time.monotonic() - started > self.slow_call_seconds:
+            # Answered, but too slowly: counts towards opening the circuit
+            self.stats["slow_calls"] += 1
+            self.breaker.record_failure()
+        else:
+            self.stats["successes"] += 1
+            self.breaker.record_success()
+        return result
+
+    def snapshot(self) -> dict:
+        return {
+            "state": self.breaker.state,
+            "consecutive_failures": self.breaker.consecutive_failures,
+            "tokens": round(self.bucket.tokens, 2),
+            **self.stats
+        }
+
+
+UPSTREAMS: Dict[str, Upstream] = {
+    "wikipedia": Upstream("wikipedia", rate=20, burst=40, timeout=4, slow_call_seconds=2),
+    "google_news": Upstream("google_news", rate=5, burst=10, timeout=4, slow_call_seconds=2.5),
+    "google_translate": Upstream("google_translate", rate=20, burst=60, timeout=4, slow_call_seconds=2),
+    "ml_service": Upstream("ml_service", rate=50, burst=100, timeout=3, slow_call_seconds=1.5),
+}
+
+
+def get_upstream(name: str) -> Upstream:
+    return UPSTREAMS[name]
+
+
+def metrics() -> Dict[str, dict]:
+    return {name: upstream.snapshot() for name, upstream in UPSTREAMS.items()}
@@ -0,0 +1,106 @@
+"""
+Feed Serialization Benchmark
+
+Compares the `/posts/` response body before and after feed card
+projection and orjson serialization, over synthetic posts shaped like
+stored ones (entities with confidences, full Pulse Context):
+
+- before: full documents through FastAPI's `jsonable_encoder` and
+  `JSONResponse` rendering
+- after: documents projected with FEED_CARD_PROJECTION, serialized by
+  `ORJSONResponse`
+
+    cd backend && python scripts/bench_feed_serialization.py [--posts 100] [--rounds 200]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from app.models.post import FEED_CARD_PROJECTION
+
+ENTITIES = [
+    ("Narendra Modi", "PER"), ("Mumbai", "LOC"), ("BJP", "ORG"),
+    ("#MumbaiRains", "ORG"), ("@BCCI", "PER"), ("Virat Kohli", "PER"),
+]
+
+
+def make_post(i: int) -> dict:
+    entities = [
+        {
+            "text": text,
+            "label": label,
+            "confidence": round(random.random(), 4),
+            "source": "model",
+            "canonical_id": text.lower().strip("#@").replace(" ", "_"),
+        }
+        for text, label in random.sample(ENTITIES, random.randint(1, 4))
+    ]
+    return {
+        "_id": f"{i:024x}",
+        "user_id": f"{i % 50:024x}",
+        "username": f"user{i % 50}",
+        "content": " ".join(random.choices("aaj mumbai mein baarish match election speech".split(), k=30)),
+        "entities": entities,
+        "risk_score": 0.4,
+        "likes": random.randint(0, 500),
+        "created_at": datetime(2026, 1, 1) + timedelta(minutes=i),
+        "profile_pic_url": None,
+        "comment_count": random.randint(0, 40),
+        "is_liked_by_user": False,
+        "is_followed_by_user": False,
+        "is_bookmarked": False,
+        "context_data": {
+            "is_generated": True,
+            "wiki": [
+                {"entity": ent["text"], "summary": "Lorem ipsum dolor sit amet. " * 12, "url": "https://en.wikipedia.org/wiki/X"}
+                for ent in entities
+            ],
+            "news": {"title": "Headline " * 8, "link": "https://news.google.com/articles/" + "x" * 80, "source": "Example"},
+        },
+    }
+
+
+def project(post: dict) -> dict:
+    """Apply FEED_CARD_PROJECTION's exclusions as Mongo would."""
+    post = dict(post)
+    for path in FEED_CARD_PROJECTION:
+        field, _, subfield = path.partition(".")
+        if not subfield:
+            post.pop(field, None)
+        elif field in post:
+            post[field] = [{k: v for k, v in item.items() if k != subfield} for item in post[field]]
+    return post
+
+
+def timed(build, rounds: int):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        body = build()
+    return (time.perf_counter() - start) / rounds, len(body)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark /posts/ response serialization")
+    parser.add_argument("--posts", type=int, default=100, help="posts per response (the /posts/ page size)")
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    random.seed(7)
+    posts = [make_post(i) for i in range(args.posts)]
+    cards = [project(post) for post in posts]
+
+    before = timed(lambda: JSONResponse(jsonable_encoder(posts)).body, args.rounds)
+    after = timed(lambda: ORJSONResponse(cards).body, args.rounds)
+
+    for label, (seconds, size) in (("before", before), ("after", after)):
+        print(f"{label:<7} {seconds * 1000:>8.2f} ms/response  {size / 1024:>8.1f} KB")
+    print(f"speedup {before[0] / after[0]:.1f}x, payload {after[1] / before[1]:.0%} of before")
@@ -0,0 +1,140 @@
+"""
+Mock Wikipedia API
+
+A local stand-in for the MediaWiki Action API's `action=query` endpoint,
+enough for the backend's batched summary lookups (titles, normalization,
+redirects, extracts, descriptions). Uses only the standard library.
+
+    python scripts/mock_wikipedia.py --port 8765 [--delay 0.5] [--fail-rate 0.2]
+    WIKI_API_URL=http://localhost:8765/w/api.php uvicorn app.main:app
+
+--delay and --fail-rate simulate a slow or failing upstream (e.g. to watch
+the circuit breaker at /metrics/upstreams). GET /stats returns how many
+queries and titles were served. tests/test_wikipedia_summaries.py runs the
+backend's lookups against it.
+"""
+
+import argparse
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+PAGES = {
+    "Narendra Modi": (
+        "Prime Minister of India since 2014",
+        "Narendra Damodardas Modi is an Indian politician who has served as the Prime Minister of India since 2014."
+    ),
+    "Mumbai": (
+        "Capital city of Maharashtra, India",
+        "Mumbai is the capital city of the Indian state of Maharashtra and the de facto financial centre of India."
+    ),
+    "Indian National Congress": (
+        "Political party in India",
+        "The Indian National Congress is a political party in India with deep roots in most regions of the country."
+    ),
+    "Bharatiya Janata Party": (
+        "Political party in India",
+        "The Bharatiya Janata Party is a political party in India and one of the two major Indian political parties."
+    ),
+    "Delhi": (
+        "National Capital Territory of India",
+        "Delhi, officially the National Capital Territory of Delhi, is a city and a union territory of India."
+    ),
+}
+
+REDIRECTS = {
+    "Modi": "Narendra Modi",
+    "NaMo": "Narendra Modi",
+    "Bombay": "Mumbai",
+    "BJP": "Bharatiya Janata Party",
+    "Congress": "Indian National Congress",
+    "New Delhi": "Delhi",
+}
+
+stats = {"queries": 0, "titles": 0}
+
+
+def normalize(title: str) -> str:
+    title = title.replace("_", " ").strip()
+    return title[:1].upper() + title[1:]
+
+
+def query(titles: list) -> dict:
+    normalized, redirects, pages, seen = [], [], [], set()
+    for title in titles:
+        target = normalize(title)
+        if target != title:
+            normalized.append({"from": title, "to": target})
+        if target in REDIRECTS:
+            redirects.append({"from": target, "to": REDIRECTS[target]})
+            target = REDIRECTS[target]
+        if target in seen:
+            continue
+        seen.add(target)
+        if target in PAGES:
+            description, extract = PAGES[target]
+            pages.append({
+                "pageid": abs(hash(target)) % 10 ** 6,
+                "ns": 0,
+                "title": target,
+                "extract": extract,
+                "description": description
+            })
+        else:
+            pages.append({"ns": 0, "title": target, "missing": True})
+
+    result = {"pages": pages}
+    if normalized:
+        result["normalized"] = normalized
+    if redirects:
+        result["redirects"] = redirects
+    return {"batchcomplete": True, "query": result}
+
+
+class Handler(BaseHTTPRequestHandler):
+    delay = 0.0
+    fail_rate = 0.0
+
+    def _send(self, status: int, body: dict):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/stats":
+            return self._send(200, stats)
+        if url.path != "/w/api.php":
+            return self._send(404, {"error": "not found"})
+
+        params = parse_qs(url.query)
+        if params.get("action", [""])[0] != "query":
+            return self._send(400, {"error": {"code": "badvalue", "info": "only action=query"}})
+
+        time.sleep(self.delay)
+        if random.random() < self.fail_rate:
+            return self._send(503, {"error": "simulated failure"})
+
+        titles = [t for t in params.get("titles", [""])[0].split("|") if t]
+        stats["queries"] += 1
+        stats["titles"] += len(titles)
+        self._send(200, query(titles))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds added to each query")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of queries answered with 503")
+    args = parser.parse_args()
+
+    Handler.delay = args.delay
+    Handler.fail_rate = args.fail_rate
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), Handler)
+    print(f"Mock Wikipedia API on http://127.0.0.1:{args.port}/w/api.php")
+    server.serve_forever()
@@ -0,0 +1,89 @@
+"""
+The ML service's /analyze/v2 post-processing (ml-service/app/postprocess.py)
+ports the backend's dictionary and hashtag/mention merge. These tests keep
+the two copies in sync: same dictionary, same merged entities.
+
+Both services have a top-level `app` package, so the ML service side runs
+in a subprocess.
+"""
+
+import json
+import os
+import runpy
+import subprocess
+import sys
+
+import pytest
+
+from conftest import BACKEND_DIR
+
+from app.services.entity_dictionary import KNOWN_ENTITIES
+from app.services.ml_client import merge_entities
+
+ML_SERVICE_DIR = os.path.join(os.path.dirname(BACKEND_DIR), "ml-service")
+
+# (text, model entities)
+FIXTURES = [
+    ("NaMo rally in मुंबई today #MumbaiRains @BCCI", [{"text": "मुंबई", "label": "LOC"}]),
+    ("Kejri and raga at the Delhi protest #GameOfThrones #game_of_thrones",
+     [{"text": "Delhi", "label": "LOC"}, {"text": "Game of Thrones", "label": "MISC"}]),
+    ("शिवाजी महाराज की जय! पुणे में उत्सव #शिवाजी", []),
+    ("They will attack at dawn #NaMo @narendramodi @NaMo", [{"text": "dawn", "label": "MISC"}]),
+    ("paragraph about yogic breathing #XMLParser @pulse_app", []),
+    ("Yogi adityanath visited #yogiadityanath camp with @yogi",
+     [{"text": "Yogi adityanath", "label": "PER"}]),
+    ("#TheGameOfThrones finale with #IPL2024 and #bcci", [{"text": "BCCI", "label": "ORG"}]),
+    ("मुंबईत पाऊस पडला", []),
+    ("मोदींनी भाषण दिले", []),
+    ("शिवाजींच्या जयंती", []),
+    ("", []),
+]
+
+_ML_MERGE = """
+import json, sys
+from app.postprocess import merge_entities
+print(json.dumps([merge_entities(text, ents) for text, ents in json.load(sys.stdin)]))
+"""
+
+
+@pytest.fixture(scope="module")
+def ml_service_merged():
+    result = subprocess.run(
+        [sys.executable, "-c", _ML_MERGE],
+        input=json.dumps(FIXTURES),
+        capture_output=True,
+        text=True,
+        cwd=ML_SERVICE_DIR,
+        check=True
+    )
+    return json.loads(result.stdout)
+
+
+# Inflected native-script words (root + suffix) and the entity they name
+INFLECTED = {
+    "मुंबईत पाऊस पडला": "Mumbai",
+    "मोदींनी भाषण दिले": "Narendra Modi",
+    "शिवाजींच्या जयंती": "Chhatrapati Shivaji Maharaj",
+}
+
+
+def test_dictionaries_match():
+    ml_copy = runpy.run_path(os.path.join(ML_SERVICE_DIR, "app", "utils", "known_entities.py"))
+    assert ml_copy["KNOWN_ENTITIES"] == KNOWN_ENTITIES
+
+
+@pytest.mark.parametrize("index", range(len(FIXTURES)))
+def test_merged_entities_match(ml_service_merged, index):
+    text, model_entities = FIXTURES[index]
+    assert ml_service_merged[index] == merge_entities(text, [dict(ent) for ent in model_entities])
+
+
+@pytest.mark.parametrize("text", INFLECTED)
+def test_inflected_native_script(ml_service_merged, text):
+    ml_entities = ml_service_merged[[fixture for fixture, _ in FIXTURES].index(text)]
+    for entities in (merge_entities(text, []), ml_entities):
+        assert [ent["identified_as"] for ent in entities] == [INFLECTED[text]]
+
+
+def test_latin_aliases_match_whole_words_only():
+    assert merge_entities("paragraph about yogic breathing", []) == []
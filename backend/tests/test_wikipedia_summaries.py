@@ -0,0 +1,106 @@
+"""fetch_wikipedia_summaries against scripts/mock_wikipedia.py."""
+
+import asyncio
+import os
+import sys
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from conftest import BACKEND_DIR
+
+sys.path.insert(0, os.path.join(BACKEND_DIR, "scripts"))
+
+import mock_wikipedia  # noqa: E402
+from app.services import ml_client  # noqa: E402
+from app.services.upstream import CLOSED, UpstreamUnavailable, get_upstream  # noqa: E402
+
+
+@pytest.fixture
+def wiki(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), mock_wikipedia.Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(ml_client, "WIKI_API_URL", f"http://127.0.0.1:{server.server_port}/w/api.php")
+
+    mock_wikipedia.stats.update(queries=0, titles=0)
+    ml_client._wiki_cache.clear()
+    ml_client._wiki_fallback.clear()
+    breaker = get_upstream("wikipedia").breaker
+    breaker.state, breaker.consecutive_failures = CLOSED, 0
+
+    yield mock_wikipedia
+    server.shutdown()
+    server.server_close()
+    mock_wikipedia.Handler.fail_rate = 0.0
+    breaker.state, breaker.consecutive_failures = CLOSED, 0
+
+
+def fetch(titles):
+    return asyncio.run(ml_client.fetch_wikipedia_summaries(titles))
+
+
+def test_titles_are_batched(wiki):
+    titles = ["Mumbai", "Delhi"] + [f"Unknown page {i}" for i in range(43)]
+
+    results = fetch(titles)
+
+    assert wiki.stats == {"queries": 3, "titles": 45}
+    assert results["Mumbai"]["title"] == "Mumbai"
+    assert results["Delhi"]["description"] == "National Capital Territory of India"
+    assert results["Unknown page 0"] is None
+
+
+def test_cached_titles_are_not_requested_again(wiki):
+    fetch(["Mumbai", "Delhi"])
+    fetch(["Mumbai", "Delhi", "BJP"])
+
+    assert wiki.stats == {"queries": 2, "titles": 3}
+
+
+def test_normalized_and_redirected_titles(wiki):
+    results = fetch(["modi", "Bombay", "new_Delhi", "BJP", "Nowhere"])
+
+    assert results["modi"]["title"] == "Narendra Modi"
+    assert results["Bombay"]["title"] == "Mumbai"
+    # Normalized to "New Delhi", then redirected
+    assert results["new_Delhi"]["title"] == "Delhi"
+    assert results["BJP"]["title"] == "Bharatiya Janata Party"
+    assert results["Nowhere"] is None
+    assert wiki.stats["queries"] == 1
+
+
+def test_failures_fall_back_to_last_good_result(wiki):
+    fetch(["Mumbai"])
+    ml_client._wiki_cache.clear()
+    wiki.Handler.fail_rate = 1.0
+
+    results = fetch(["Mumbai", "Delhi"])
+
+    assert results["Mumbai"]["title"] == "Mumbai"
+    assert results["Delhi"] is None
+
+
+def test_repeated_failures_open_the_circuit(wiki):
+    wiki.Handler.fail_rate = 1.0
+    breaker = get_upstream("wikipedia").breaker
+
+    for i in range(breaker.failure_threshold):
+        assert fetch([f"Page {i}"]) == {f"Page {i}": None}
+    queries_before = wiki.stats["queries"]
+
+    assert fetch(["Mumbai"]) == {"Mumbai": None}
+    assert breaker.state != CLOSED
+    assert wiki.stats["queries"] == queries_before
+
+
+def test_failures_raise_without_fallback(wiki):
+    fetch(["Mumbai"])
+    ml_client._wiki_cache.clear()
+    wiki.Handler.fail_rate = 1.0
+
+    with pytest.raises(UpstreamUnavailable):
+        asyncio.run(ml_client.fetch_wikipedia_summaries(["Mumbai"], fallback=False))
+    # Missing articles are still None, not unavailable
+    wiki.Handler.fail_rate = 0.0
+    assert asyncio.run(ml_client.fetch_wikipedia_summaries(["Nowhere"], fallback=False)) == {"Nowhere": None}
@@ -1,18 +1,11 @@
-from transformers import pipeline
+from app.registry import LoadedModel, registry
 
-MODEL_PATH = "models/ner_model"
 
-ner_pipeline = pipeline(
-    "ner",
-    model=MODEL_PATH,
-    tokenizer=MODEL_PATH,
-    aggregation_strategy="simple"
-)
+# Texts per forward pass in batch inference
+BATCH_SIZE = 16
 
 
-def run_ner(text: str):
-    results = ner_pipeline(text)
-
+def _to_entities(text: str, results: list):
     entities = []
 
     for ent in results:
@@ -28,7 +21,22 @@ def run_ner(text: str):
         
         entities.append({
             "text": actual_text,
-            "label": ent["entity_group"]
+            "label": ent["entity_group"],
+            "confidence": round(float(ent["score"]), 4)
         })
 
     return entities
+
+
+def run_ner(text: str, model: LoadedModel = None):
+    model = model or registry.current
+    return _to_entities(text, model.pipeline(text))
+
+
+def run_ner_batch(texts: list, model: LoadedModel = None):
+    """NER for many texts, batched through the model BATCH_SIZE at a time."""
+    if not texts:
+        return []
+    model = model or registry.current
+    results = model.pipeline(texts, batch_size=BATCH_SIZE)
+    return [_to_entities(text, result) for text, result in zip(texts, results)]
@@ -1,33 +1,165 @@
-from fastapi import FastAPI
+import os
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-from app.inference import run_ner
+from typing import List
+from app.inference import run_ner, run_ner_batch
+from app.postprocess import filter_by_confidence, fuse_entities
+from app.registry import DEFAULT_MODEL, registry
 
-app = FastAPI(title="Pulse NER Moderation Service")
+# Startup timings, reported by /readyz and /metrics
+STARTUP = {
+    "imported_at": time.time(),
+    "preloaded": False
+}
+
+# Under gunicorn with preload_app (gunicorn.conf.py) the model is loaded once
+# in the master and shared copy-on-write by the forked workers
+if os.getenv("ML_PRELOAD_MODEL") == "1":
+    registry.activate(DEFAULT_MODEL, warm_up=False)
+    STARTUP["preloaded"] = True
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load in the background so /healthz answers while the model loads;
+    # /readyz reports 503 until it is warm
+    if registry.current is None:
+        registry.activate_in_background(DEFAULT_MODEL)
+    yield
+
+
+app = FastAPI(title="Pulse NER Moderation Service", lifespan=lifespan)
+
+
+MAX_BATCH_TEXTS = 256
+
+# Required in X-Admin-Token to switch models, when set
+MODEL_ADMIN_TOKEN = os.getenv("MODEL_ADMIN_TOKEN")
 
 
 class TextRequest(BaseModel):
     text: str
 
 
+class BatchTextRequest(BaseModel):
+    texts: List[str]
+
+
+class ActivateRequest(BaseModel):
+    version: str
+
+
+def _ready_model():
+    model = registry.current
+    if model is None:
+        raise HTTPException(status_code=503, detail="Model is loading")
+    return model
+
+
+def _startup_metrics() -> dict:
+    model = registry.current
+    ready_at = model.loaded_at + (model.warmup_seconds or 0) if model else None
+    return {
+        **STARTUP,
+        "model_ready_at": ready_at,
+        "seconds_to_ready": round(ready_at - STARTUP["imported_at"], 2) if ready_at else None
+    }
+
+
 @app.get("/")
 def health():
     return {"status": "NER service running"}
 
 
+@app.get("/healthz")
+def liveness():
+    """The process is up (the model may still be loading)."""
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+def readiness():
+    """200 once a warmed-up model is serving, 503 before."""
+    if registry.current is None:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "loading", "loading": registry.loading, "last_error": registry.last_error}
+        )
+    return {"status": "ready", "model_version": registry.current.version, **_startup_metrics()}
+
+
+@app.get("/metrics")
+def metrics():
+    """Startup timings and the serving model's load/warm-up times."""
+    return {"startup": _startup_metrics(), "model": registry.status()}
+
+
 @app.post("/analyze")
 def analyze_text(request: TextRequest):
-    entities = run_ner(request.text)
+    model = _ready_model()
+    entities = filter_by_confidence(run_ner(request.text, model))
 
-    sensitive_labels = {"PERSON", "ORG", "GPE", "LOC"}
+    # Risk is scored by the backend (app/services/risk.py) once the
+    # dictionary and hashtag entities are merged in
+    return {
+        "entities": entities,
+        "model_version": model.version
+    }
 
-    risk_score = min(1.0, len(entities) * 0.25)
 
-    contains_sensitive = any(
-        ent["label"] in sensitive_labels for ent in entities
-    )
+@app.post("/analyze/batch")
+def analyze_batch(request: BatchTextRequest):
+    """Entities for many texts in one call (used by the backend's backfill)."""
+    if len(request.texts) > MAX_BATCH_TEXTS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_TEXTS} texts per batch")
 
+    model = _ready_model()
     return {
-        "entities": entities,
-        "risk_score": round(risk_score, 2),
-        "contains_sensitive_entity": contains_sensitive
+        "results": [
+            {"entities": filter_by_confidence(entities)}
+            for entities in run_ner_batch(request.texts, model)
+        ],
+        "model_version": model.version
     }
+
+
+@app.post("/analyze/v2")
+def analyze_v2(request: BatchTextRequest):
+    """
+    Final entities for one or more texts: model entities above their label's
+    confidence threshold, refined names, dictionary, hashtag and mention
+    entities, in one batched model pass (see app/postprocess.py).
+    """
+    if len(request.texts) > MAX_BATCH_TEXTS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_TEXTS} texts per batch")
+
+    model = _ready_model()
+    return {
+        "results": [
+            {"entities": fuse_entities(text, entities, filter_by_confidence(entities))}
+            for text, entities in zip(request.texts, run_ner_batch(request.texts, model))
+        ],
+        "model_version": model.version
+    }
+
+
+@app.get("/models")
+def model_status():
+    """The serving model version, and any load in progress."""
+    return registry.status()
+
+
+@app.post("/models/activate", status_code=202)
+def activate_model(request: ActivateRequest, x_admin_token: str = Header(None)):
+    """
+    Load a model directory under MODELS_DIR in the background, warm it up,
+    then swap it in. The current model keeps serving until then.
+    """
+    if MODEL_ADMIN_TOKEN and x_admin_token != MODEL_ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+    if not registry.activate_in_background(request.version):
+        raise HTTPException(status_code=409, detail=f"Already loading {registry.loading}")
+    return {"loading": request.version}
@@ -0,0 +1,265 @@
+"""
+Fused Entity Post-processing (/analyze/v2)
+
+Turns raw model output into the final entity list in the ML service, so the
+backend makes one call and gets entities ready to store:
+
+1. Confidence filtering: model entities scoring below the threshold for
+   their label (CONF_THRESH) are dropped. /analyze and /analyze/batch
+   apply the same `filter_by_confidence`
+2. Refinement: capitalised names next to person-context verbs that the
+   model missed (`utils/refinement.refine_entities`), minus dictionary
+   aliases and known places
+3. `merge_entities`: dictionary aliases (`utils/known_entities`), then
+   hashtags and @mentions matched to dictionary or model entities
+
+`merge_entities` is a port of the backend's `ml_client.merge_entities`:
+for the same model entities both return the same list, which
+backend/tests/test_entity_merge_parity.py checks. /analyze/v2 can still
+return more entities than the backend path, since only it refines.
+"""
+
+import os
+import re
+from functools import lru_cache
+from typing import NamedTuple, Tuple
+
+from app.utils.known_entities import KNOWN_ENTITIES
+from app.utils.refinement import refine_entities
+
+# Per-label thresholds tuned in model_result/evaluate_paper.py; override one
+# with NER_THRESH_<LABEL> (e.g. NER_THRESH_PER=0.5), other labels with NER_THRESH_DEFAULT
+_TUNED_THRESH = {
+    "PER": 0.40,
+    "LOC": 0.70,
+    "ORG": 0.70,
+    "MISC": 0.60
+}
+CONF_THRESH = {
+    label: float(os.getenv(f"NER_THRESH_{label}", threshold))
+    for label, threshold in _TUNED_THRESH.items()
+}
+DEFAULT_THRESHOLD = float(os.getenv("NER_THRESH_DEFAULT", "0.5"))
+
+# refine_entities uses spaCy-style labels and qualitative confidence
+_REFINEMENT_LABELS = {"PERSON": "PER"}
+_REFINEMENT_CONFIDENCE = 0.5
+
+# Same tokenization as the backend's text_utils.scan
+_TOKEN_RE = re.compile(r"([#@]?)((?:\w|[\u0900-\u0D7F])+)")
+_CAMEL_RE = re.compile(r"([a-z])([A-Z])")
+_ACRONYM_RE = re.compile(r"([A-Z]+)([A-Z][a-z])")
+
+HASHTAG = "hashtag"
+MENTION = "mention"
+
+
+class Tag(NamedTuple):
+    kind: str          # HASHTAG or MENTION
+    text: str          # without the leading # or @
+    normalized: str
+    key: str
+
+
+class TokenStream(NamedTuple):
+    words: Tuple[str, ...]
+    spans: Tuple[Tuple[int, int], ...]
+    tags: Tuple[Tag, ...]
+
+
+def match_key(text: str) -> str:
+    return text.lower().replace(" ", "")
+
+
+def normalize_hashtag(tag: str) -> str:
+    if "_" in tag:
+        return tag.replace("_", " ")
+    return _ACRONYM_RE.sub(r"\1 \2", _CAMEL_RE.sub(r"\1 \2", tag))
+
+
+@lru_cache(maxsize=4096)
+def scan(text: str) -> TokenStream:
+    """Lowercased words (with offsets), hashtags and mentions of `text`."""
+    words, spans, tags = [], [], []
+    for match in _TOKEN_RE.finditer(text):
+        sigil, body = match.groups()
+        words.append(body.lower())
+        spans.append(match.span(2))
+        if sigil == "#":
+            normalized = normalize_hashtag(body)
+            tags.append(Tag(HASHTAG, body, normalized, match_key(normalized)))
+        elif sigil == "@":
+            tags.append(Tag(MENTION, body, body, body.lower()))
+    return TokenStream(tuple(words), tuple(spans), tuple(tags))
+
+
+# Dictionary aliases and English names by match key; the first entry wins
+_DICTIONARY_BY_KEY = {}
+for _alias, (_english_name, _label) in KNOWN_ENTITIES.items():
+    _DICTIONARY_BY_KEY.setdefault(match_key(_alias), (_english_name, _label))
+    _DICTIONARY_BY_KEY.setdefault(match_key(_english_name), (_english_name, _label))
+
+# Dictionary aliases by their words, e.g. ("raga",) -> ("Rahul Gandhi", "PER")
+_DICTIONARY_BY_WORDS = {}
+for _alias, (_english_name, _label) in KNOWN_ENTITIES.items():
+    _DICTIONARY_BY_WORDS.setdefault(scan(_alias).words, (_english_name, _label))
+_MAX_ALIAS_WORDS = max(len(words) for words in _DICTIONARY_BY_WORDS)
+
+# Native-script roots also match inflected words ("मुंबईत", "मोदींनी");
+# Latin aliases only match whole words, so "raga" is not found in "paragraph"
+_NATIVE_ROOTS = sorted(
+    (words[0] for words in _DICTIONARY_BY_WORDS if len(words) == 1 and not words[0].isascii()),
+    key=len,
+    reverse=True
+)
+
+
+def _native_root(word: str):
+    """The longest native-script root `word` starts with, if any."""
+    if word.isascii():
+        return None
+    for root in _NATIVE_ROOTS:
+        if word.startswith(root):
+            return root
+    return None
+
+
+def filter_by_confidence(entities: list) -> list:
+    """Drop model entities scoring below their label's threshold."""
+    # A handful of entities per text: a comprehension beats building arrays
+    return [
+        ent for ent in entities
+        if ent["confidence"] >= CONF_THRESH.get(ent["label"], DEFAULT_THRESHOLD)
+    ]
+
+
+def _refined(text: str, model_entities: list) -> list:
+    return [
+        {
+            "text": ent["text"],
+            "label": _REFINEMENT_LABELS.get(ent["label"], ent["label"]),
+            "confidence": _REFINEMENT_CONFIDENCE,
+            "source": "refinement"
+        }
+        for ent in refine_entities(text, model_entities)
+        # Dictionary aliases and known places ("Mumbai") are not new people
+        if match_key(ent["text"]) not in _DICTIONARY_BY_KEY
+    ]
+
+
+def _dictionary_entities(text: str, stream: TokenStream) -> list:
+    words = stream.words
+    entities = []
+    detected = set()
+    for i in range(len(words)):
+        start = stream.spans[i][0]
+        # Longest alias starting at this word
+        for n in range(min(_MAX_ALIAS_WORDS, len(words) - i), 0, -1):
+            known = _DICTIONARY_BY_WORDS.get(words[i:i + n])
+            if known:
+                end = stream.spans[i + n - 1][1]
+                break
+        else:
+            # Or a native-script root with a suffix, matched up to the root
+            root = _native_root(words[i])
+            if not root:
+                continue
+            known = _DICTIONARY_BY_WORDS[(root,)]
+            end = start + len(root)
+
+        english_name, label = known
+        if english_name not in detected:
+            entities.append({
+                "text": text[start:end],
+                "label": label,
+                "confidence": 1.0,
+                "source": "dictionary",
+                "identified_as": english_name
+            })
+            detected.add(english_name)
+    return entities
+
+
+def _strip_fillers(key: str) -> str:
+    return key.replace("the", "").replace("of", "")
+
+
+def _match_hashtag(tag: Tag, entities: list):
+    known = _DICTIONARY_BY_KEY.get(tag.key)
+    if known:
+        english_name, label = known
+        return tag.normalized, label, english_name
+
+    entity_keys = [(match_key(ent["text"]), ent) for ent in entities]
+    for ent_key, ent in entity_keys:
+        if tag.key == ent_key:
+            return ent["text"], ent["label"], ent.get("identified_as")
+
+    tag_clean = _strip_fillers(tag.key)
+    if len(tag_clean) > 3:
+        for ent_key, ent in entity_keys:
+            if tag_clean == _strip_fillers(ent_key):
+                return ent["text"], ent["label"], ent.get("identified_as")
+    return None
+
+
+def _tag_entities(tags: Tuple[Tag, ...], known_entities: list) -> list:
+    detected = {match_key(ent["text"]) for ent in known_entities}
+    entities = []
+
+    for tag in tags:
+        if tag.kind != HASHTAG or tag.key in detected:
+            continue
+
+        match = _match_hashtag(tag, known_entities)
+        if match:
+            matched_text, label, identified_as = match
+            entities.append({
+                "text": f"#{tag.text}",
+                "label": label,
+                "confidence": 0.9,
+                "source": "hashtag",
+                "identified_as": identified_as or matched_text
+            })
+        else:
+            entities.append({
+                "text": f"#{tag.text}",
+                "label": "ORG",
+                "confidence": 0.7,
+                "source": "hashtag",
+                "identified_as": tag.normalized.title() if tag.normalized != tag.text else None
+            })
+        detected.add(tag.key)
+
+    for tag in tags:
+        if tag.kind != MENTION or tag.key in detected:
+            continue
+        entities.append({
+            "text": f"@{tag.text}",
+            "label": "PER",
+            "confidence": 0.9,
+            "source": "mention"
+        })
+        detected.add(tag.key)
+
+    return entities
+
+
+def merge_entities(text: str, model_entities: list) -> list:
+    """Model entities plus dictionary, hashtag and mention entities."""
+    stream = scan(text)
+    dict_entities = _dictionary_entities(text, stream)
+    tag_entities = _tag_entities(stream.tags, dict_entities + model_entities)
+
+    # Dictionary first, then hashtags/mentions, then model entities
+    return dict_entities + tag_entities + model_entities
+
+
+def fuse_entities(text: str, model_entities: list, confident_entities: list) -> list:
+    """
+    Final entities for one text, from all its model entities and those
+    that passed `filter_by_confidence`.
+    """
+    # Refine against everything the model found, so names dropped for low
+    # confidence are not added back as refinements
+    return merge_entities(text, confident_entities + _refined(text, model_entities))
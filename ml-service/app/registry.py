@@ -0,0 +1,198 @@
+"""
+Model Registry
+
+Holds the NER pipeline currently serving requests and swaps in new
+versions without a restart:
+
+1. POST /models/activate {"version": "<dir under MODELS_DIR>"} starts
+   loading that model in a background thread; the current one keeps
+   serving.
+2. The new pipeline is warmed up with WARMUP_TEXTS so the first real
+   request doesn't pay for lazy initialisation.
+3. `current` is replaced in a single assignment. Requests read
+   `registry.current` once and use that model throughout, so every
+   response is produced, and tagged, by exactly one version.
+
+A version is "<directory>@<fingerprint>". The fingerprint is the contents
+of a VERSION file shipped in the model directory when there is one, and
+otherwise a hash of the config, tokenizer and weight file contents,
+computed once per load. Identical weights copied to another replica or
+image get the same version; replacing a model in place changes the
+version the backend stores with each post's entities.
+
+Each worker has its own registry: with several workers, activate on each
+of them, or restart with MODEL_NAME set to the new directory.
+
+Loading:
+- `transformers` is imported on first load, not at import time, so the
+  process starts serving /healthz immediately.
+- With MODEL_USE_SAFETENSORS=1 weights must come from model.safetensors,
+  which is memory-mapped rather than read and unpickled;
+  `python -m app.registry convert <dir>` writes one next to a
+  pytorch_model.bin.
+"""
+
+import glob
+import hashlib
+import os
+import sys
+import threading
+import time
+from typing import Optional
+
+MODELS_DIR = os.getenv("MODELS_DIR", "models")
+DEFAULT_MODEL = os.getenv("MODEL_NAME", "ner_model")
+USE_SAFETENSORS = os.getenv("MODEL_USE_SAFETENSORS") == "1"
+
+WARMUP_TEXTS = [
+    "Narendra Modi met Rahul Gandhi in New Delhi on Monday.",
+    "मुंबई में आज भारी बारिश हुई",
+    "Maine kal Virat Kohli ko Wankhede stadium mein dekha #IPL",
+]
+
+# Optional file in a model directory holding its release version
+VERSION_FILE = "VERSION"
+
+_CONFIG_FILES = ("config.json", "tokenizer.json")
+_CHUNK_SIZE = 1 << 20
+
+
+class LoadedModel:
+    def __init__(self, name: str, version: str, ner_pipeline, load_seconds: float):
+        self.name = name
+        self.version = version
+        self.pipeline = ner_pipeline
+        self.load_seconds = load_seconds
+        self.warmup_seconds = None
+        self.loaded_at = time.time()
+
+    def warm_up(self):
+        started = time.perf_counter()
+        self.pipeline(WARMUP_TEXTS)
+        self.warmup_seconds = time.perf_counter() - started
+
+
+def _weight_files(path: str) -> list:
+    # Safetensors are loaded in preference to .bin files when both exist
+    for pattern in ("*.safetensors", "*.bin"):
+        files = sorted(glob.glob(os.path.join(path, pattern)))
+        if files:
+            return files
+    return []
+
+
+def model_fingerprint(path: str) -> str:
+    """Hash of the config, tokenizer and weight file contents."""
+    digest = hashlib.sha1()
+    files = [os.path.join(path, name) for name in _CONFIG_FILES] + _weight_files(path)
+    for file_path in files:
+        if not os.path.exists(file_path):
+            continue
+        digest.update(os.path.basename(file_path).encode())
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+                digest.update(chunk)
+    return digest.hexdigest()[:10]
+
+
+def model_version(name: str, path: str) -> str:
+    version_file = os.path.join(path, VERSION_FILE)
+    if os.path.isfile(version_file):
+        with open(version_file) as f:
+            version = f.read().strip()
+        if version:
+            return f"{name}@{version}"
+    return f"{name}@{model_fingerprint(path)}"
+
+
+def _model_path(name: str) -> str:
+    path = os.path.join(MODELS_DIR, name)
+    if os.path.basename(name) != name or not os.path.isdir(path):
+        raise FileNotFoundError(f"No model directory {path}")
+    return path
+
+
+def load_model(name: str, warm_up: bool = True) -> LoadedModel:
+    """Build (and by default warm up) the pipeline for models/<name>."""
+    path = _model_path(name)
+
+    started = time.perf_counter()
+    from transformers import pipeline
+
+    ner_pipeline = pipeline(
+        "ner",
+        model=path,
+        tokenizer=path,
+        aggregation_strategy="simple",
+        model_kwargs={"use_safetensors": True} if USE_SAFETENSORS else {}
+    )
+
+    version = model_version(name, path)
+    model = LoadedModel(name, version, ner_pipeline, time.perf_counter() - started)
+    if warm_up:
+        model.warm_up()
+    return model
+
+
+class ModelRegistry:
+    def __init__(self):
+        self.current: Optional[LoadedModel] = None
+        self.loading: Optional[str] = None
+        self.last_error: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def activate(self, name: str, warm_up: bool = True):
+        """Load `name` and make it current (blocking)."""
+        model = load_model(name, warm_up)
+        self.current = model
+        print(f"Model {model.version} active (loaded in {model.load_seconds:.1f}s)")
+
+    def activate_in_background(self, name: str) -> bool:
+        """Start loading `name`; False if another load is in progress."""
+        with self._lock:
+            if self.loading is not None:
+                return False
+            self.loading = name
+            self.last_error = None
+
+        def run():
+            try:
+                self.activate(name)
+            except Exception as e:
+                self.last_error = f"{name}: {e}"
+                print(f"Model Load Error: {self.last_error}")
+            finally:
+                self.loading = None
+
+        threading.Thread(target=run, name=f"load-{name}", daemon=True).start()
+        return True
+
+    def status(self) -> dict:
+        current = self.current
+        return {
+            "version": current.version if current else None,
+            "loaded_at": current.loaded_at if current else None,
+            "load_seconds": round(current.load_seconds, 2) if current else None,
+            "warmup_seconds": round(current.warmup_seconds, 2) if current and current.warmup_seconds else None,
+            "loading": self.loading,
+            "last_error": self.last_error,
+            "available": sorted(
+                entry for entry in os.listdir(MODELS_DIR)
+                if os.path.isfile(os.path.join(MODELS_DIR, entry, "config.json"))
+            ) if os.path.isdir(MODELS_DIR) else []
+        }
+
+
+registry = ModelRegistry()
+
+
+if __name__ == "__main__":
+    # python -m app.registry convert <dir>: write model.safetensors for MODEL_USE_SAFETENSORS
+    if len(sys.argv) != 3 or sys.argv[1] != "convert":
+        sys.exit("usage: python -m app.registry convert <model dir under MODELS_DIR>")
+
+    from transformers import AutoModelForTokenClassification
+
+    path = _model_path(sys.argv[2])
+    AutoModelForTokenClassification.from_pretrained(path).save_pretrained(path, safe_serialization=True)
+    print(f"Wrote {os.path.join(path, 'model.safetensors')}")
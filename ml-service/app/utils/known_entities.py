@@ -0,0 +1,31 @@
+"""
+Multilingual Entity Dictionary (ML service copy)
+
+Known aliases (slang, Hinglish, native script) mapped to the entity's
+English name and label, used by `/analyze/v2`. Keep in sync with
+backend/app/services/entity_dictionary.py, which the backend uses when the
+fused endpoint is not enabled; backend/tests/test_entity_merge_parity.py
+fails when the two differ.
+"""
+
+KNOWN_ENTITIES = {
+    # Hinglish / Slang
+    "raga": ("Rahul Gandhi", "PER"),
+    "namo": ("Narendra Modi", "PER"),
+    "pappu": ("Rahul Gandhi", "PER"),
+    "kejri": ("Arvind Kejriwal", "PER"),
+    "yogi": ("Yogi Adityanath", "PER"),
+    
+    # Marathi / Hindi (Roots)
+    "शिवाजी": ("Chhatrapati Shivaji Maharaj", "PER"),
+    "पुणे": ("Pune", "LOC"),
+    "मुंबई": ("Mumbai", "LOC"),
+    "ठाकरे": ("Bal Thackeray", "PER"),
+    "फडणवीस": ("Devendra Fadnavis", "PER"),
+    "पवार": ("Sharad Pawar", "PER"),
+    "शिंदे": ("Eknath Shinde", "PER"),
+    "मोदी": ("Narendra Modi", "PER"),
+    "भारत": ("India", "GPE"),
+    "दिल्ली": ("Delhi", "LOC"),
+    "केजरीवाल": ("Arvind Kejriwal", "PER")
+}
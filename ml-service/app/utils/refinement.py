@@ -14,24 +14,65 @@ FUNCTION_WORDS = {
 }
 
 
+# Capitalised for reasons other than being a name
+STOPWORDS = {
+    "I", "A", "An", "The", "This", "That", "These", "Those",
+    "He", "She", "It", "We", "You", "They", "Me", "Him", "Her", "Us", "Them",
+    "My", "Our", "Your", "His", "Their",
+    "Today", "Yesterday", "Tomorrow", "Tonight",
+    "Mr", "Mrs", "Ms", "Dr", "Sir", "Ji"
+}
+
+
+# A capitalised word after these is a place or a title ("at Wankhede", "The Hindu")
+NON_PERSON_PREVIOUS = {"the", "a", "an", "at", "in", "from", "near", "to", "into", "of"}
+
+
+SENTENCE_END = (".", "!", "?", "|", "।")
+
+
+def _clean(token):
+    return re.sub(r"[^\w]", "", token)
+
+
 def refine_entities(text, model_entities):
+    """
+    Capitalised words near a person-context verb ("met", "with", ...) that
+    the model missed. Skips words inside a model entity, stopwords,
+    sentence-initial words, words after an article or a place preposition,
+    and hashtags/mentions.
+    """
     refined = []
 
-    existing = {e["text"] for e in model_entities}
+    covered = {
+        word.lower()
+        for e in model_entities
+        for word in re.findall(r"\w+", e["text"])
+    }
 
     tokens = text.split()
 
     for i, token in enumerate(tokens):
-        clean = re.sub(r"[^\w]", "", token)
+        clean = _clean(token)
 
         if (
             not clean
-            or clean in existing
+            or token[0] in "#@"
+            or clean.lower() in covered
             or clean in FUNCTION_WORDS
+            or clean in STOPWORDS
+            or clean.lower() in PERSON_CONTEXT_VERBS
             or not clean[0].isupper()
         ):
             continue
 
+        previous = tokens[i - 1] if i > 0 else None
+        # Sentence-initial words are capitalised anyway
+        if previous is None or previous.endswith(SENTENCE_END):
+            continue
+        if _clean(previous).lower() in NON_PERSON_PREVIOUS:
+            continue
+
         window = tokens[max(0, i - 3): i + 4]
         window_lower = {w.lower() for w in window}
 
@@ -42,5 +83,6 @@ def refine_entities(text, model_entities):
                 "source": "refinement",
                 "confidence": "low"
             })
+            covered.add(clean.lower())
 
     return refined
@@ -0,0 +1,38 @@
+"""
+Gunicorn settings for the ML service.
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+The app (and with it the NER model) is imported once in the master
+before forking, so workers share the weights copy-on-write instead of each
+loading its own copy. Each worker warms the shared model up after the fork,
+since the inference thread pools must not be created before it.
+"""
+
+import gc
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:9001")
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = 120
+
+# Read by app.main at import time (in the master)
+os.environ.setdefault("ML_PRELOAD_MODEL", "1")
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+
+def pre_fork(server, worker):
+    # Move everything allocated so far out of the collector's reach, so
+    # collections in the workers don't touch (and copy) the shared pages
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    import torch
+    from app.registry import registry
+
+    torch.set_num_threads(int(os.getenv("TORCH_THREADS", "1")))
+    if registry.current is not None:
+        registry.current.warm_up()